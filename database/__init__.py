@@ -3,9 +3,20 @@
 # This file makes the 'database' folder a Python package and exposes all
 # necessary functions for other parts of the application to use.
 
-from .connection import create_tables
+from .connection import close_all_connections, apply_performance_profile, PERFORMANCE_PRESETS
+from .migrations import create_tables
+from .query_stats import (configure_query_stats, get_query_stats, reset_query_stats,
+                          DEFAULT_SLOW_QUERY_MS, SLOW_QUERY_LOG)
+from .writer import start_writer, stop_writer, submit_write
+from .async_read import submit_read, read_in_background, shutdown_readers
+from .backup import (create_backup, restore_backup, replace_database,
+                     stage_restore_from_rows, restore_from_rows)
+from .export import export_csv_backup, open_csv_file
+from .merge import merge_import
+from .import_pipeline import import_accounts_file, preview_accounts_file
 from .read import (
     get_table_data_for_export,
+    iter_table_data_for_export,
     get_all_accounts_data,
     get_total_accounts_count,
     get_all_pages_data,
@@ -15,12 +26,20 @@ from .read import (
     get_unique_page_categories,
     get_unique_account_categories,
     get_profile_id_map,
+    find_account_by_profile_id,
+    find_accounts_by_profile_ids,
     get_deleted_items,
     get_dependent_pages_count,
     check_duplicate,
+    check_import_duplicates,
     get_multiple_accounts_details,
     get_accounts_for_proxy_edit,
-    get_multiple_pages_details
+    get_multiple_pages_details,
+    get_used_folders,
+    get_pages_using_folder,
+    get_data_version,
+    get_latest_change_seq,
+    get_changes_since
 )
 from .write import (
     wipe_and_restore_database,
@@ -28,6 +47,9 @@ from .write import (
     add_page,
     bulk_add_pages,
     bulk_import_accounts,
+    normalize_account_record,
+    account_import_key,
+    import_normalized_accounts,
     update_account_details,
     bulk_update_accounts_partial,
     update_page_details,
@@ -35,7 +57,11 @@ from .write import (
     update_account_note,
     soft_delete,
     restore_item,
+    soft_delete_items,
+    restore_items,
     permanently_delete_items,
     quick_edit_items,
-    bulk_update_pages_partial
+    bulk_update_pages_partial,
+    record_used_folders,
+    prune_changelog
 )
\ No newline at end of file
@@ -0,0 +1,97 @@
+# database/async_read.py
+
+"""
+Non-blocking access to the read functions in database/read.py.
+
+Reads run on a small thread pool; each worker thread uses its own pooled
+connection. Three ways to call them:
+    submit_read(func, *args)                  -> concurrent.futures.Future
+    await async_read.get_all_accounts_data()  -> coroutine per read function
+    read_in_background(parent, callback, func, *args)
+                                              -> callback(result) on the Qt GUI thread
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from utils import log
+from . import connection, read
+
+READ_WORKERS = 2 # Reader threads, each with its own connection
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix='db-read')
+        return _executor
+
+def submit_read(func, *args, **kwargs):
+    """Runs func(*args, **kwargs) on a reader thread and returns a Future with its result."""
+    return _get_executor().submit(func, *args, **kwargs)
+
+def shutdown_readers(wait=True):
+    """Stops the reader threads after their current reads. They restart on the next submit."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+def _as_coroutine(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.wrap_future(submit_read(func, *args, **kwargs))
+    return wrapper
+
+# One coroutine per public read function, with the same name and arguments
+for _name, _func in inspect.getmembers(read, inspect.isfunction):
+    if _func.__module__ == read.__name__ and not _name.startswith('_'):
+        globals()[_name] = _as_coroutine(_func)
+
+# --- Qt Bridge ---
+class _ReadRelay(QObject):
+    """Lives on the GUI thread; a signal emitted from a reader thread is queued to it."""
+    finished = pyqtSignal(object)
+    dropped = pyqtSignal()
+
+def _is_stale(future, generation):
+    """True for a read cancelled by shutdown_readers() or one that ran across a restore's pool reset."""
+    return future.cancelled() or generation != connection._pool_generation
+
+def _future_result(future):
+    error = future.exception()
+    if error:
+        log.error(f"Background read failed: {error}")
+        return (False, str(error))
+    return future.result()
+
+def read_in_background(parent, callback, func, *args, **kwargs):
+    """
+    Runs a read function on a reader thread and calls callback(result) on the
+    GUI thread. The callback is dropped if parent is destroyed first, or if the
+    read was cancelled or outlived the connections it ran on (a restore resets both);
+    the caller reloads after a restore anyway.
+    """
+    relay = _ReadRelay(parent)
+    relay.finished.connect(callback)
+    relay.finished.connect(relay.deleteLater)
+    relay.dropped.connect(relay.deleteLater)
+    generation = connection._pool_generation
+
+    def deliver(future):
+        try:
+            if _is_stale(future, generation):
+                relay.dropped.emit()
+            else:
+                relay.finished.emit(_future_result(future))
+        except RuntimeError:
+            pass # The parent widget, and the relay with it, is already gone
+    submit_read(func, *args, **kwargs).add_done_callback(deliver)
+    return relay
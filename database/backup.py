@@ -0,0 +1,247 @@
+# database/backup.py
+
+"""
+Native SQLite backups through the backup API, and restores by file swap.
+
+create_backup copies a consistent snapshot of the live database while the app
+keeps reading and writing. Restores never touch the live tables: the new content
+is staged in a separate file (a copied backup, or a database rebuilt from CSV rows
+by stage_restore_from_rows) and replace_database swaps it in with one os.replace,
+after stopping the writer and closing every pooled connection. Other running
+instances of the app must be closed before a restore; replace_database refuses
+the swap while any other connection still has the live file open.
+"""
+
+import os
+import sqlite3
+from utils import log
+from . import async_read, connection, migrations, writer
+from .write import _restore_rows
+
+BACKUP_PAGES_PER_STEP = 1024 # Database pages copied between progress reports
+SWAP_LOCK_TIMEOUT = 1.0 # Seconds to wait for other connections to let go of the live file
+_REQUIRED_TABLES = ('accounts', 'pages')
+
+# The staged file is thrown away on any failure, so it is loaded without a journal,
+# syncing or foreign key checks; the keys are verified once after the load instead
+FAST_LOAD_PRAGMAS = {'journal_mode': 'OFF', 'synchronous': 'OFF', 'foreign_keys': 'OFF',
+                     'locking_mode': 'EXCLUSIVE', 'cache_size': -262144, 'temp_store': 'MEMORY'}
+BASE_SCHEMA_VERSION = 1 # Tables only; indexes, triggers and derived tables come after the load
+
+def _copy(source, target_path, progress=None):
+    """Copies the source connection's database into a new file at target_path."""
+    def report(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=report)
+        target.execute("PRAGMA journal_mode = DELETE") # A single self-contained file, without -wal/-shm
+    finally:
+        target.close()
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def create_backup(target_path, progress=None):
+    """
+    Writes a snapshot of the database to target_path. progress(copied_pages, total_pages)
+    is called after every step. Returns (success, message).
+    """
+    if os.path.abspath(target_path) == os.path.abspath(connection.DATABASE_NAME):
+        return (False, "The backup file cannot be the live database.")
+    partial_path = f"{target_path}.part"
+    source = connection.create_connection()
+    if not source:
+        return (False, "Database connection failed.")
+    try:
+        # An open read transaction pins one WAL snapshot, so commits made meanwhile
+        # by the app neither restart the copy nor end up half in it
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        _remove_file(partial_path)
+        _copy(source, partial_path, progress)
+        os.replace(partial_path, target_path)
+        log.info(f"Database backed up to '{target_path}'.")
+        return (True, f"Backup saved to {target_path}")
+    except (sqlite3.Error, OSError) as e:
+        log.error(f"Backup failed: {e}")
+        _remove_file(partial_path)
+        return (False, str(e))
+    finally:
+        source.close()
+
+def _check_backup_file(path):
+    """Returns (success, message) for whether path is an intact database with the app's tables."""
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if result != 'ok':
+                return (False, f"Backup file is damaged: {result}")
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return (False, f"Not a valid database backup: {e}")
+    missing = [table for table in _REQUIRED_TABLES if table not in tables]
+    if missing:
+        return (False, f"Backup file has no {', '.join(missing)} table.")
+    return (True, "ok")
+
+def _staged_path():
+    return f"{connection.DATABASE_NAME}.restore"
+
+def _check_exclusive_access(database_path):
+    """
+    Returns (success, message) for whether no other connection has the live file open.
+    In WAL mode a plain BEGIN EXCLUSIVE does not wait for readers, but an exclusive
+    locking mode has to lock out every connection that still holds the WAL index.
+    """
+    if not os.path.exists(database_path):
+        return (True, "ok")
+    conn = sqlite3.connect(database_path, timeout=SWAP_LOCK_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+        conn.execute("BEGIN EXCLUSIVE")
+        conn.execute("COMMIT")
+        return (True, "ok")
+    except sqlite3.Error as e:
+        log.error(f"Restore refused, the database is still open elsewhere: {e}")
+        return (False, "The database is open in another copy of this tool. Close every other copy and try again.")
+    finally:
+        conn.close() # Released before the swap, which Windows does not allow on an open file
+
+def replace_database(staged_path):
+    """
+    Swaps the finished database file at staged_path in for the live database and
+    migrates it to the current schema. Refuses, discarding staged_path, while another
+    connection has the live database open. Returns (success, message).
+    """
+    database_path = connection.DATABASE_NAME
+    writer_was_running = writer.is_writer_running()
+    writer.stop_writer() # Finishes queued writes first
+    async_read.shutdown_readers()
+    connection.close_all_connections()
+    try:
+        success, message = _check_exclusive_access(database_path)
+        if not success:
+            _remove_file(staged_path)
+            return (False, message)
+        os.replace(staged_path, database_path)
+        # A leftover WAL belongs to the old file and must not be replayed into the new one
+        for suffix in ('-wal', '-shm'):
+            _remove_file(f"{database_path}{suffix}")
+    except OSError as e:
+        log.error(f"Restore failed while replacing the database: {e}")
+        _remove_file(staged_path)
+        return (False, str(e))
+    finally:
+        if writer_was_running:
+            writer.start_writer()
+
+    success, version = migrations.create_tables()
+    if not success:
+        return (False, f"Database restored, but upgrading its schema failed: {version}")
+    return (True, "Restore successful.")
+
+def restore_backup(backup_path, progress=None):
+    """
+    Replaces the live database with the backup at backup_path, then migrates it to
+    the current schema. progress(copied_pages, total_pages) reports the copy into place.
+    Returns (success, message).
+    """
+    success, message = _check_backup_file(backup_path)
+    if not success:
+        return (False, message)
+
+    staged_path = _staged_path()
+    try:
+        # Copy next to the live file first, so the swap itself is a single rename
+        _remove_file(staged_path)
+        source = sqlite3.connect(backup_path)
+        try:
+            _copy(source, staged_path, progress)
+        finally:
+            source.close()
+    except (sqlite3.Error, OSError) as e:
+        log.error(f"Restore failed while staging '{backup_path}': {e}")
+        _remove_file(staged_path)
+        return (False, str(e))
+
+    success, message = replace_database(staged_path)
+    if success:
+        log.info(f"Database restored from '{backup_path}'.")
+    return (success, message)
+
+def _verify_staged_database(conn, expected_counts):
+    """Returns (success, message) for whether the loaded file is intact and complete."""
+    orphan = conn.execute("PRAGMA foreign_key_check").fetchone()
+    if orphan:
+        return (False, f"Backup has {orphan[0]} rows linked to missing {orphan[2]} rows (e.g. rowid {orphan[1]}).")
+    result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    if result != 'ok':
+        return (False, f"Restored database failed its integrity check: {result}")
+    for table_name, expected in expected_counts.items():
+        count = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        if count != expected:
+            return (False, f"Restored {count} of {expected} {table_name} rows.")
+    return (True, "ok")
+
+def stage_restore_from_rows(accounts_rows, pages_rows, progress=None, page_folders_rows=None):
+    """
+    Builds a complete database in a new file from iterables of dicts (e.g. csv.DictReader).
+    Columns the schema does not know are ignored. Without page_folders_rows, the folder
+    history is seeded from pages.used_folders. progress(table_name, rows_restored)
+    is called after each chunk. Returns (True, staged_path) for replace_database,
+    or (False, message) with nothing left behind.
+    """
+    staged_path = _staged_path()
+    _remove_file(staged_path)
+    conn = sqlite3.connect(staged_path)
+    try:
+        for name, value in FAST_LOAD_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        success, version = migrations.run_migrations(conn, BASE_SCHEMA_VERSION)
+        if not success:
+            raise sqlite3.OperationalError("Could not create the base tables.")
+
+        counts = {}
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        for table_name, rows in (('accounts', accounts_rows), ('pages', pages_rows)):
+            columns = {col[1] for col in cursor.execute(f"PRAGMA table_info({table_name})")}
+            counts[table_name] = _restore_rows(cursor, table_name, rows, progress, columns)
+        conn.commit()
+
+        success, version = migrations.run_migrations(conn)
+        if not success:
+            raise sqlite3.OperationalError(f"Schema migration {version + 1} failed on the restored data.")
+        if page_folders_rows is not None:
+            # Replaces the history seeded from used_folders, keeping content types and first-use times
+            cursor.execute("BEGIN")
+            cursor.execute("DELETE FROM page_folders")
+            columns = {col[1] for col in cursor.execute("PRAGMA table_info(page_folders)")}
+            counts['page_folders'] = _restore_rows(cursor, 'page_folders', page_folders_rows, progress, columns)
+            conn.commit()
+        success, message = _verify_staged_database(conn, counts)
+        if not success:
+            raise sqlite3.IntegrityError(message)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+        log.info(f"Staged restore of {counts['accounts']} accounts and {counts['pages']} pages.")
+        return (True, staged_path)
+    except Exception as e:
+        log.error(f"Staging restore failed: {e}")
+        conn.close()
+        _remove_file(staged_path)
+        return (False, str(e))
+
+def restore_from_rows(accounts_rows, pages_rows, progress=None, page_folders_rows=None):
+    """stage_restore_from_rows followed by replace_database. Returns (success, message)."""
+    success, result = stage_restore_from_rows(accounts_rows, pages_rows, progress, page_folders_rows)
+    if not success:
+        return (False, result)
+    return replace_database(result)
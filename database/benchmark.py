@@ -0,0 +1,106 @@
+# database/benchmark.py
+
+"""
+Measures read and write throughput of each performance preset on a copy of the
+current database. The live database is only read (through the backup API).
+
+Run from the project root:
+    python -m database.benchmark [path/to/pagedata.db]
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from utils import log
+from . import connection, migrations, read, write
+
+READ_SECONDS = 2.0 # Time spent looping over the read mix per preset
+WRITE_COMMITS = 200 # Single-row transactions, where synchronous matters most
+BULK_ROWS = 5000 # Rows in one bulk import transaction
+
+def _copy_database(source, target):
+    """Copies source to target with the backup API, so WAL content is included."""
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+def _measure_reads(rng):
+    profile_ids = [row[1] for row in read.get_all_accounts()[1]] or [None]
+    categories = read.get_unique_account_categories()[1] or ['All Categories']
+    operations = 0
+    deadline = time.perf_counter() + READ_SECONDS
+    while time.perf_counter() < deadline:
+        read.get_all_accounts_data(limit=100, after_profile_id=rng.choice(profile_ids))
+        read.get_all_accounts_data(account_category_filter=rng.choice(categories), limit=100)
+        read.get_total_accounts_count()
+        read.get_all_accounts_data(str(rng.randint(100, 999)), limit=100)
+        operations += 4
+    return operations / READ_SECONDS
+
+def _measure_writes(run_id):
+    start = time.perf_counter()
+    for i in range(WRITE_COMMITS):
+        write.add_account({'profile_id': f"BENCH-{run_id}-{i}", 'account_name': f"Benchmark {i}", 'uid': None})
+    commits_per_second = WRITE_COMMITS / (time.perf_counter() - start)
+
+    records = [{'profile_id': f"BULK-{run_id}-{i}", 'account_name': f"Bulk {i}"} for i in range(BULK_ROWS)]
+    start = time.perf_counter()
+    write.bulk_import_accounts(records)
+    return commits_per_second, BULK_ROWS / (time.perf_counter() - start)
+
+def run_benchmark(database_path=None, presets=None):
+    """
+    Benchmarks each preset on its own fresh copy of the database.
+    Returns (success, results) where results maps preset name to
+    {'reads_per_sec', 'commits_per_sec', 'bulk_rows_per_sec'}.
+    """
+    database_path = database_path or connection.DATABASE_NAME
+    if not os.path.exists(database_path):
+        return (False, f"Database '{database_path}' not found.")
+
+    original_db = connection.DATABASE_NAME
+    original_pragmas = connection._performance_pragmas
+    work_dir = tempfile.mkdtemp(prefix='db_benchmark_')
+    results = {}
+    try:
+        for run_id, preset in enumerate(presets or connection.PERFORMANCE_PRESETS):
+            copy_path = os.path.join(work_dir, f"{preset}.db")
+            _copy_database(database_path, copy_path)
+            connection.DATABASE_NAME = copy_path
+            connection.apply_performance_profile(preset)
+            migrations.create_tables()
+
+            reads_per_sec = _measure_reads(random.Random(run_id))
+            commits_per_sec, bulk_rows_per_sec = _measure_writes(run_id)
+            results[preset] = {'reads_per_sec': reads_per_sec, 'commits_per_sec': commits_per_sec,
+                               'bulk_rows_per_sec': bulk_rows_per_sec}
+            connection.close_all_connections()
+            os.remove(copy_path)
+        return (True, results)
+    except Exception as e:
+        log.error(f"Benchmark failed: {e}")
+        return (False, str(e))
+    finally:
+        connection.close_all_connections()
+        connection.DATABASE_NAME = original_db
+        connection._performance_pragmas = original_pragmas
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def format_results(results):
+    lines = [f"{'Preset':<12} {'Reads/s':>10} {'Commits/s':>10} {'Bulk rows/s':>12}"]
+    for preset, r in results.items():
+        lines.append(f"{preset:<12} {r['reads_per_sec']:>10.0f} {r['commits_per_sec']:>10.0f} {r['bulk_rows_per_sec']:>12.0f}")
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    success, results = run_benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(format_results(results) if success else f"Benchmark failed: {results}")
+    sys.exit(0 if success else 1)
@@ -1,98 +1,276 @@
 # database/connection.py
 
 import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
 from utils import log
+from . import query_stats
 
 DATABASE_NAME = 'pagedata.db'
+INSTANCE_ID = uuid.uuid4().hex # Written to changelog.origin by this process's connections
+STATEMENT_CACHE_SIZE = 256 # Prepared statements kept per connection
+
+# --- Connection Pool ---
+# Every thread gets one long-lived connection. Pragmas are applied once when it
+# is opened and sqlite's statement cache survives between queries. It is closed
+# when its thread ends, so short-lived worker threads do not leave connections open.
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pooled_connections = []
+_pool_generation = 0
+
+# --- Write Batches ---
+# While the writer thread runs a batch, each job sits in this savepoint inside one
+# transaction: commits are deferred to the batch and rollbacks only undo the job.
+WRITE_JOB_SAVEPOINT = 'write_job'
+
+# --- Performance Profile ---
+# Named pragma presets for the "database" section of settings.json. Each pooled
+# connection applies the active one when it opens.
+PERFORMANCE_PRESETS = {
+    # Every commit is synced to disk; smallest memory footprint
+    'safe': {'synchronous': 'FULL', 'cache_size': -16000, 'mmap_size': 0, 'temp_store': 'DEFAULT',
+             'busy_timeout': 5000, 'wal_autocheckpoint': 1000},
+    # WAL with synchronous=NORMAL cannot corrupt the database; a power cut may lose the last commits
+    'balanced': {'synchronous': 'NORMAL', 'cache_size': -65536, 'mmap_size': 268435456, 'temp_store': 'MEMORY',
+                 'busy_timeout': 5000, 'wal_autocheckpoint': 1000},
+    # For large imports only: no syncing and rare checkpoints
+    'bulk_import': {'synchronous': 'OFF', 'cache_size': -262144, 'mmap_size': 268435456, 'temp_store': 'MEMORY',
+                    'busy_timeout': 10000, 'wal_autocheckpoint': 10000}
+}
+DEFAULT_PERFORMANCE_PROFILE = 'balanced'
+_PRAGMA_CHOICES = {'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'), 'temp_store': ('DEFAULT', 'FILE', 'MEMORY')}
+_performance_pragmas = dict(PERFORMANCE_PRESETS[DEFAULT_PERFORMANCE_PROFILE])
+
+# --- Full-Text Search ---
+# Set by migrations.create_tables() once the trigram FTS5 indexes are known to exist.
+_fts_enabled = False
+
+# --- ID Lists ---
+# Longer id lists are loaded into a temp table instead of being expanded into
+# IN (?, ?, ...), which gets slow to parse and fails past SQLITE_MAX_VARIABLE_NUMBER.
+ID_LIST_TEMP_TABLE_THRESHOLD = 500
 
 def create_connection():
     """Establishes a connection to the SQLite database."""
     try:
-        conn = sqlite3.connect(DATABASE_NAME)
+        # check_same_thread is off so close_all_connections() can close the pool from any thread
+        conn = sqlite3.connect(DATABASE_NAME, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
         conn.execute("PRAGMA foreign_keys = ON;") # Enforce foreign key constraints
         conn.execute("PRAGMA journal_mode = WAL;") # Enable Write-Ahead Logging
+        for name, value in _performance_pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value};")
+        _tag_own_changes(conn)
         return conn
     except sqlite3.Error as e:
         log.error(f"Database connection error: {e}")
         return None
 
-def _execute_query(query, params=(), commit=False, fetch=None, executemany=False):
-    """A central wrapper for all database queries."""
+def _tag_own_changes(conn):
+    """
+    Adds a TEMP trigger, private to this connection, that stamps the change log
+    entries it writes with INSTANCE_ID. Skipped until changelog.origin exists,
+    since the trigger would otherwise fail every write.
+    """
+    has_origin = conn.execute("SELECT 1 FROM pragma_table_info('changelog') WHERE name = 'origin'").fetchone()
+    if has_origin:
+        conn.execute(f"""
+            CREATE TEMP TRIGGER IF NOT EXISTS changelog_origin AFTER INSERT ON main.changelog
+            WHEN new.origin IS NULL BEGIN
+                UPDATE changelog SET origin = '{INSTANCE_ID}' WHERE seq = new.seq;
+            END""")
+
+def _sync_query_tracing(conn):
+    """Installs or removes the query statistics trace to match the setting. Each thread does its own connection."""
+    enabled = query_stats.is_enabled()
+    if _local.traced != enabled:
+        conn.set_trace_callback(query_stats.trace_statement if enabled else None)
+        _local.traced = enabled
+
+class _ConnectionOwner:
+    """Held only by the thread-local, so it is freed together with the thread's locals."""
+
+def _release_connection(conn):
+    """Closes a finished thread's connection unless close_all_connections() already did."""
+    with _pool_lock:
+        if conn not in _pooled_connections:
+            return
+        _pooled_connections.remove(conn)
+    try:
+        conn.close()
+    except sqlite3.Error as e:
+        log.warning(f"Failed to close connection of a finished thread: {e}")
+
+def get_connection():
+    """Returns the calling thread's pooled connection, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.generation == _pool_generation:
+        _sync_query_tracing(conn)
+        return conn
+
     conn = create_connection()
+    if conn:
+        with _pool_lock:
+            _pooled_connections.append(conn)
+        _local.owner = _ConnectionOwner()
+        weakref.finalize(_local.owner, _release_connection, conn)
+    _local.conn = conn
+    _local.generation = _pool_generation
+    _local.traced = False
+    if conn:
+        _sync_query_tracing(conn)
+    return conn
+
+def close_all_connections():
+    """Closes every pooled connection. Threads reconnect on their next query."""
+    global _pool_generation
+    with _pool_lock:
+        _pool_generation += 1
+        connections = list(_pooled_connections)
+        _pooled_connections.clear()
+    for conn in connections:
+        try:
+            conn.execute("PRAGMA optimize;") # Refresh planner statistics the new indexes rely on
+            conn.close()
+        except sqlite3.Error as e:
+            log.warning(f"Failed to close pooled connection: {e}")
+
+def resolve_performance_profile(profile=DEFAULT_PERFORMANCE_PROFILE, overrides=None):
+    """
+    Returns (success, pragmas) for a preset name plus per-pragma overrides. Unknown
+    presets fall back to the default and invalid overrides are skipped, with success False.
+    """
+    success = True
+    if profile not in PERFORMANCE_PRESETS:
+        log.warning(f"Unknown database profile '{profile}', using '{DEFAULT_PERFORMANCE_PROFILE}'.")
+        profile, success = DEFAULT_PERFORMANCE_PROFILE, False
+    pragmas = dict(PERFORMANCE_PRESETS[profile])
+    for name, value in (overrides or {}).items():
+        try:
+            if name not in pragmas:
+                raise ValueError("unknown pragma")
+            if name in _PRAGMA_CHOICES:
+                value = str(value).upper()
+                if value not in _PRAGMA_CHOICES[name]:
+                    raise ValueError(f"expected one of {', '.join(_PRAGMA_CHOICES[name])}")
+            else:
+                value = int(value)
+            pragmas[name] = value
+        except (TypeError, ValueError) as e:
+            log.warning(f"Ignoring database setting {name}={value!r}: {e}")
+            success = False
+    return (success, pragmas)
+
+def apply_performance_profile(profile=DEFAULT_PERFORMANCE_PROFILE, overrides=None):
+    """Makes the profile active and reopens pooled connections with it. Returns (success, pragmas)."""
+    global _performance_pragmas
+    success, pragmas = resolve_performance_profile(profile, overrides)
+    _performance_pragmas = pragmas
+    close_all_connections()
+    log.info(f"Database performance profile '{profile}': {pragmas}")
+    return (success, pragmas)
+
+def in_write_batch():
+    return getattr(_local, 'write_batch', False)
+
+def _commit(conn):
+    """Commits, unless the writer thread will commit the whole batch later."""
+    if not in_write_batch():
+        conn.commit()
+
+def _rollback(conn):
+    """Rolls back the transaction, or in a write batch just the current job."""
+    if not in_write_batch():
+        conn.rollback()
+        return
+    try:
+        conn.execute(f"ROLLBACK TO {WRITE_JOB_SAVEPOINT}")
+    except sqlite3.Error:
+        # SQLite already aborted the whole transaction; the writer fails the batch
+        conn.rollback()
+        _local.write_batch_broken = True
+
+@contextmanager
+def transaction():
+    """Yields a cursor on the pooled connection; commits on success, rolls back on error."""
+    conn = get_connection()
+    if not conn:
+        raise sqlite3.OperationalError("Database connection failed.")
+    cursor = conn.cursor()
+    try:
+        yield cursor
+        _commit(conn)
+    except Exception:
+        _rollback(conn)
+        raise
+
+def fts_enabled():
+    """True once create_tables() has confirmed the full-text search indexes exist."""
+    return _fts_enabled
+
+def _execute_query(query, params=(), commit=False, fetch=None, executemany=False):
+    """A central wrapper for all database queries. Timed into query_stats while that is enabled."""
+    conn = get_connection()
     if not conn:
         return (False, "Database connection failed.")
+    timed = query_stats.is_enabled()
     try:
+        if timed:
+            query_stats.set_timing(True)
+        start = time.perf_counter()
         cursor = conn.cursor()
         if executemany:
             cursor.executemany(query, params)
         else:
             cursor.execute(query, params)
-        
+
         if commit:
-            conn.commit()
+            _commit(conn)
             result = cursor.lastrowid if not executemany else cursor.rowcount
-            return (True, result)
-        
-        if fetch == 'one':
-            return (True, cursor.fetchone())
+            rows = max(cursor.rowcount, 0)
+        elif fetch == 'one':
+            result = cursor.fetchone()
+            rows = int(result is not None)
         elif fetch == 'all':
-            return (True, cursor.fetchall())
-        
-        return (True, True)
+            result = cursor.fetchall()
+            rows = len(result)
+        else:
+            result, rows = True, max(cursor.rowcount, 0)
+
+        if timed:
+            query_stats.record_query(query, params, time.perf_counter() - start, rows)
+        return (True, result)
     except sqlite3.Error as e:
         log.error(f"Database query failed: {e}\nQuery: {query}\nParams: {params}")
-        if conn:
-            conn.rollback()
+        _rollback(conn)
         return (False, str(e))
     finally:
-        if conn:
-            conn.close()
+        if timed:
+            query_stats.set_timing(False)
 
-def create_tables():
-    """Creates the necessary tables and indexes if they don't exist."""
-    _execute_query('''
-        CREATE TABLE IF NOT EXISTS accounts (
-            account_id INTEGER PRIMARY KEY AUTOINCREMENT, profile_id TEXT NOT NULL UNIQUE,
-            account_name TEXT NOT NULL, uid TEXT UNIQUE, account_category TEXT,
-            status TEXT, monetization TEXT, proxy TEXT, proxy_location TEXT,
-            is_deleted INTEGER DEFAULT 0, note TEXT DEFAULT ''
-        )
-    ''', commit=True)
-    _execute_query('''
-        CREATE TABLE IF NOT EXISTS pages (
-            page_id INTEGER PRIMARY KEY AUTOINCREMENT, page_name TEXT NOT NULL,
-            uid_page_id TEXT, category TEXT, content_folder TEXT, used_folders TEXT,
-            video_schedule_date TEXT, video_posts_per_day INTEGER,
-            reels_schedule_date TEXT, reels_posts_per_day INTEGER,
-            photo_schedule_date TEXT, photo_posts_per_day INTEGER,
-            note TEXT, status TEXT, monetization TEXT, is_deleted INTEGER DEFAULT 0,
-            linked_account_id INTEGER,
-            video_folder TEXT, reels_folder TEXT, photo_folder TEXT,
-            followers TEXT, last_interaction TEXT,
-            FOREIGN KEY (linked_account_id) REFERENCES accounts (account_id) ON DELETE CASCADE
-        )
-    ''', commit=True)
-    
-    _execute_query("CREATE INDEX IF NOT EXISTS idx_accounts_profile_id ON accounts (profile_id);", commit=True)
-    _execute_query("CREATE INDEX IF NOT EXISTS idx_pages_linked_account_id ON pages (linked_account_id);", commit=True)
-
-    # Schema migration for existing tables
-    conn = create_connection()
-    if not conn: return
-    try:
-        cursor = conn.cursor()
-        account_columns = [col[1] for col in cursor.execute("PRAGMA table_info(accounts)").fetchall()]
-        if 'note' not in account_columns:
-            cursor.execute("ALTER TABLE accounts ADD COLUMN note TEXT DEFAULT ''")
-
-        page_columns = [col[1] for col in cursor.execute("PRAGMA table_info(pages)").fetchall()]
-        columns_to_add = {
-            'video_folder': 'TEXT', 'reels_folder': 'TEXT', 'photo_folder': 'TEXT',
-            'followers': 'TEXT', 'last_interaction': 'TEXT'
-        }
-        for col, col_type in columns_to_add.items():
-            if col not in page_columns:
-                cursor.execute(f"ALTER TABLE pages ADD COLUMN {col} {col_type}")
-        conn.commit()
-    finally:
-        conn.close()
\ No newline at end of file
+def _ids_condition(column, ids, temp_name='id_list'):
+    """
+    Returns (sql, params) restricting column to the given ids. Large lists go into
+    temp.<temp_name> on the pooled connection, so the query must run on the same thread.
+    Use a different temp_name for each list in one query.
+    """
+    ids = list(ids)
+    if len(ids) > ID_LIST_TEMP_TABLE_THRESHOLD:
+        conn = get_connection()
+        if conn:
+            in_transaction = conn.in_transaction
+            try:
+                conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {temp_name} (id INTEGER PRIMARY KEY)")
+                conn.execute(f"DELETE FROM temp.{temp_name}")
+                conn.executemany(f"INSERT OR IGNORE INTO temp.{temp_name} (id) VALUES (?)", ((row_id,) for row_id in ids))
+                if not in_transaction:
+                    conn.commit() # Only temp pages were written, so this does not sync the database file
+                return (f"{column} IN (SELECT id FROM temp.{temp_name})", [])
+            except sqlite3.Error as e:
+                log.warning(f"Could not load ids into temp table '{temp_name}', using an IN list: {e}")
+                if not in_transaction:
+                    conn.rollback()
+    return (f"{column} IN ({','.join(['?'] * len(ids))})", ids)
@@ -0,0 +1,53 @@
+# database/export.py
+
+"""
+CSV export that streams rows from the database to disk, so memory use does not
+grow with table size. Paths ending in .gz are gzip-compressed.
+"""
+
+import csv
+import gzip
+from utils import log
+from .read import iter_table_data_for_export
+
+EXPORT_TABLES = ('accounts', 'pages', 'page_folders')
+
+def open_csv_file(path, mode='r'):
+    """Opens a CSV file for text reading or writing, through gzip if path ends in .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, f"{mode}t", newline='', encoding='utf-8')
+    return open(path, mode, newline='', encoding='utf-8')
+
+def export_table_to_csv(table_name, path):
+    """Writes the table's live rows to path with a header row. Returns (success, row_count)."""
+    success, headers, rows = iter_table_data_for_export(table_name)
+    if not success:
+        return (False, f"Failed to fetch {table_name}: {headers}")
+    count = 0
+    try:
+        with open_csv_file(path, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    except Exception as e:
+        log.error(f"Export of {table_name} to '{path}' failed: {e}")
+        return (False, str(e))
+    return (True, count)
+
+def export_csv_backup(base_path, compress=False):
+    """
+    Exports every table to <base_path>_<table>.csv (or .csv.gz).
+    Returns (success, paths) or (False, error message).
+    """
+    extension = '.csv.gz' if compress else '.csv'
+    paths = []
+    for table_name in EXPORT_TABLES:
+        path = f"{base_path}_{table_name}{extension}"
+        success, result = export_table_to_csv(table_name, path)
+        if not success:
+            return (False, result)
+        log.info(f"Exported {result} {table_name} rows to '{path}'.")
+        paths.append(path)
+    return (True, paths)
@@ -0,0 +1,142 @@
+# database/import_pipeline.py
+
+"""
+File import for very large account lists.
+
+The file is read in chunks of lines. A process pool parses, normalizes and
+validates the chunks in parallel, and the results go to the writer thread in file
+order, one chunk per transaction. Reading, parsing and writing overlap, and at
+most a few chunks are held in memory at a time.
+
+preview_accounts_file runs the same parsing without writing and reports, per row,
+why a row would be rejected or skipped as a duplicate.
+"""
+
+import collections
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils import log
+from .export import open_csv_file
+from .read import check_import_duplicates
+from .write import account_import_key, import_normalized_accounts, normalize_account_record
+from .writer import submit_write
+
+IMPORT_CHUNK_LINES = 20000 # Lines parsed per task
+IMPORT_WORKERS = max(1, (os.cpu_count() or 2) - 1) # Leaves a core for the GUI and the writer
+CHUNKS_IN_FLIGHT_PER_WORKER = 2 # Bounds memory: chunks read but not yet parsed
+
+def parse_account_lines(lines, separator, mapping, keep_rejected=False):
+    """
+    Parses separated lines into normalized account rows. mapping is
+    {column position: account field}. Returns (rows, rejected line count);
+    with keep_rejected, rejected lines stay in rows as None.
+    Runs in worker processes, so it must stay a top-level function.
+    """
+    rows, rejected = [], 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(separator)
+        row = normalize_account_record({field: parts[i] for i, field in mapping.items() if i < len(parts)})
+        if row or keep_rejected:
+            rows.append(row)
+        if not row:
+            rejected += 1
+    return rows, rejected
+
+def _line_chunks(path, chunk_lines):
+    with open_csv_file(path) as f:
+        while True:
+            chunk = list(itertools.islice(f, chunk_lines))
+            if not chunk:
+                return
+            yield chunk
+
+def _parsed_chunks(pool, path, separator, mapping, in_flight, keep_rejected=False):
+    """Yields (line count, rows, rejected) per chunk in file order, with at most in_flight chunks being parsed."""
+    parsing = collections.deque()
+    for chunk in _line_chunks(path, IMPORT_CHUNK_LINES):
+        parsing.append((len(chunk), pool.submit(parse_account_lines, chunk, separator, mapping, keep_rejected)))
+        while len(parsing) >= in_flight:
+            lines, future = parsing.popleft()
+            yield (lines, *future.result())
+    while parsing:
+        lines, future = parsing.popleft()
+        yield (lines, *future.result())
+
+def import_accounts_file(path, separator, mapping, progress=None, workers=IMPORT_WORKERS):
+    """
+    Imports a separated text file (.gz allowed) of accounts. progress(rows_done, rows_per_sec)
+    is called after each chunk is written. Returns (True, stats) with lines, imported,
+    rejected (missing profile_id or name), duplicates (already in the database),
+    seconds and rows_per_sec; or (False, message).
+    """
+    if not separator or not mapping:
+        return (False, "A separator and at least one mapped column are required.")
+
+    stats = {'lines': 0, 'imported': 0, 'rejected': 0, 'duplicates': 0}
+    start = time.perf_counter()
+    writing = collections.deque() # (row count, write future), in file order
+
+    def finish_write():
+        count, future = writing.popleft()
+        success, inserted = future.result()
+        if not success:
+            raise RuntimeError(inserted)
+        stats['imported'] += inserted
+        stats['duplicates'] += count - inserted
+        if progress:
+            done = stats['imported'] + stats['duplicates'] + stats['rejected']
+            progress(done, done / max(time.perf_counter() - start, 1e-9))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for lines, rows, rejected in _parsed_chunks(pool, path, separator, mapping, workers * CHUNKS_IN_FLIGHT_PER_WORKER):
+                stats['lines'] += lines
+                stats['rejected'] += rejected
+                if rows:
+                    # One chunk at a time, so each is its own transaction rather than a savepoint in a batch
+                    while writing:
+                        finish_write()
+                    writing.append((len(rows), submit_write(import_normalized_accounts, rows)))
+        while writing:
+            finish_write()
+    except Exception as e:
+        log.error(f"Account file import of '{path}' failed: {e}")
+        return (False, f"Import stopped after {stats['imported']} new accounts: {e}")
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = (stats['imported'] + stats['duplicates'] + stats['rejected']) / max(stats['seconds'], 1e-9)
+    log.info(f"Imported accounts from '{path}': {stats}")
+    return (True, stats)
+
+def preview_accounts_file(path, separator, mapping, progress=None, workers=IMPORT_WORKERS):
+    """
+    Checks what import_accounts_file would do, without writing. progress(rows_checked)
+    is called after each chunk. Returns (True, report) as from check_import_duplicates,
+    where row numbers count the file's non-blank lines, plus seconds; or (False, message).
+    """
+    if not separator or not mapping:
+        return (False, "A separator and at least one mapped column are required.")
+    start = time.perf_counter()
+
+    def keys():
+        checked = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for _, rows, _ in _parsed_chunks(pool, path, separator, mapping, workers * CHUNKS_IN_FLIGHT_PER_WORKER, keep_rejected=True):
+                for row in rows:
+                    yield account_import_key(row)
+                checked += len(rows)
+                if progress:
+                    progress(checked)
+
+    success, report = check_import_duplicates(keys())
+    if not success:
+        log.error(f"Account file preview of '{path}' failed: {report}")
+        return (False, report)
+    report['seconds'] = time.perf_counter() - start
+    log.info(f"Previewed account import from '{path}': {report['rows']} rows, {len(report['conflicts'])} conflicts in {report['seconds']:.1f}s")
+    return (True, report)
@@ -0,0 +1,167 @@
+# database/merge.py
+
+"""
+Merge import: applies a backup on top of the existing data instead of replacing it.
+
+The backup rows are loaded into temp tables, then inserts and updates are computed
+with set-based statements. Only rows whose values differ are written, so everything
+else (and the change log) stays untouched.
+
+Accounts match on profile_id. Pages match on uid_page_id, or failing that on
+(account, page_name). Backup pages are re-linked through their account's profile_id,
+since account ids differ between databases. The folder history in page_folders is
+not merged; written pages add their used_folders to it without content types.
+"""
+
+import itertools
+from utils import log
+from .connection import transaction
+from .migrations import SHADOW_COLUMNS
+from .write import _restore_rows
+from .writer import queued_write
+
+def _table_columns(cursor, table_name):
+    return [col[1] for col in cursor.execute(f"PRAGMA table_info({table_name})")]
+
+def _peek_headers(rows):
+    """Returns (headers of the first row, an iterator over all rows)."""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return [], iter(())
+    return list(first.keys()), itertools.chain([first], rows)
+
+def _load_import_table(cursor, table_name, rows, progress):
+    """Loads rows into temp.import_<table_name>, typed like the real table. Returns (columns present, count)."""
+    import_table = f"import_{table_name}"
+    headers, rows = _peek_headers(rows)
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{import_table}")
+    # CREATE TABLE AS keeps the column affinities, so '0' from a CSV compares equal to 0
+    cursor.execute(f"CREATE TEMP TABLE {import_table} AS SELECT * FROM main.{table_name} WHERE 0")
+    columns = _table_columns(cursor, import_table)
+    count = _restore_rows(cursor, import_table, rows, progress, set(columns))
+    return [col for col in columns if col in headers], count
+
+def _source_columns(cursor, table_name, columns):
+    """
+    Maps each column to the expression copying it from the import row (alias i).
+    A NULL exported to CSV comes back as '', so blanks become NULL again in the
+    nullable TEXT columns without a default (e.g. uid, which is UNIQUE).
+    """
+    blank_as_null = {name for _, name, col_type, notnull, default, _ in cursor.execute(f"PRAGMA main.table_info({table_name})")
+                     if col_type.upper() == 'TEXT' and not notnull and default is None}
+    return {col: f"NULLIF(i.{col}, '')" if col in blank_as_null else f"i.{col}" for col in columns}
+
+def _differs(columns, target='t', source='i'):
+    # A NULL exported to CSV comes back as '', which is not a change
+    return ' OR '.join(f"COALESCE({target}.{col}, '') IS NOT COALESCE({source}.{col}, '')" for col in columns)
+
+def _merge_accounts(cursor, rows, progress):
+    present, total = _load_import_table(cursor, 'accounts', rows, progress)
+    if 'profile_id' not in present:
+        return {'total': total, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'uid_conflicts': 0, 'skipped': total}
+    columns = [col for col in present if col != 'account_id']
+    data_columns = [col for col in columns if col != 'profile_id']
+    cursor.execute("CREATE INDEX temp.idx_import_accounts_profile ON import_accounts (profile_id)")
+    cursor.execute("DELETE FROM import_accounts WHERE COALESCE(profile_id, '') = ''")
+    source = _source_columns(cursor, 'accounts', columns)
+
+    # UPDATE OR IGNORE and INSERT OR IGNORE can only skip a row for its uid, which
+    # another account already has; count those by comparing with the candidates
+    updated = update_conflicts = 0
+    if data_columns:
+        changed = cursor.execute(f"""
+            SELECT COUNT(DISTINCT t.account_id) FROM import_accounts i JOIN accounts t ON t.profile_id = i.profile_id
+            WHERE {_differs(data_columns)}
+        """).fetchone()[0]
+        cursor.execute(f"""
+            UPDATE OR IGNORE accounts AS t SET {', '.join(f"{col} = {source[col]}" for col in data_columns)}
+            FROM import_accounts i
+            WHERE t.profile_id = i.profile_id AND ({_differs(data_columns)})
+        """)
+        updated = cursor.rowcount
+        update_conflicts = changed - updated
+    matched = cursor.execute("SELECT COUNT(*) FROM import_accounts i WHERE EXISTS (SELECT 1 FROM accounts t WHERE t.profile_id = i.profile_id)").fetchone()[0]
+    new_profiles = cursor.execute("""
+        SELECT COUNT(DISTINCT profile_id) FROM import_accounts i
+        WHERE NOT EXISTS (SELECT 1 FROM accounts t WHERE t.profile_id = i.profile_id)
+    """).fetchone()[0]
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO accounts ({', '.join(columns)})
+        SELECT {', '.join(source[col] for col in columns)} FROM import_accounts i
+        WHERE NOT EXISTS (SELECT 1 FROM accounts t WHERE t.profile_id = i.profile_id)
+    """)
+    inserted = cursor.rowcount
+    insert_conflicts = new_profiles - inserted
+    return {'total': total, 'inserted': inserted, 'updated': updated, 'unchanged': matched - updated - update_conflicts,
+            'uid_conflicts': update_conflicts + insert_conflicts, 'skipped': total - matched - inserted - insert_conflicts}
+
+def _merge_pages(cursor, rows, progress):
+    present, total = _load_import_table(cursor, 'pages', rows, progress)
+    columns = [col for col in present if col not in ('page_id', 'linked_account_id') and col not in SHADOW_COLUMNS]
+    if 'page_name' not in columns or 'linked_account_id' not in present:
+        return {'total': total, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'uid_conflicts': 0, 'skipped': total}
+
+    cursor.execute("ALTER TABLE import_pages ADD COLUMN target_account_id INTEGER")
+    cursor.execute("ALTER TABLE import_pages ADD COLUMN match_page_id INTEGER")
+    # Backup account id -> profile_id -> local account id
+    cursor.execute("""
+        UPDATE import_pages SET target_account_id = a.account_id
+        FROM import_accounts ia JOIN accounts a ON a.profile_id = ia.profile_id
+        WHERE ia.account_id = import_pages.linked_account_id
+    """)
+    # A page repeated in the backup (same uid_page_id, or same account and name
+    # without one) is merged once, from its first row
+    key = ("target_account_id, NULLIF(uid_page_id, ''), CASE WHEN COALESCE(uid_page_id, '') = '' THEN page_name END"
+           if 'uid_page_id' in columns else "target_account_id, page_name")
+    cursor.execute(f"DELETE FROM import_pages WHERE rowid NOT IN (SELECT MIN(rowid) FROM import_pages GROUP BY {key})")
+    if 'uid_page_id' in columns:
+        cursor.execute("CREATE INDEX temp.idx_import_pages_uid ON import_pages (uid_page_id)")
+        cursor.execute("""
+            UPDATE import_pages SET match_page_id = p.page_id FROM pages p
+            WHERE p.uid_page_id = import_pages.uid_page_id AND COALESCE(import_pages.uid_page_id, '') != ''
+        """)
+    cursor.execute("""
+        UPDATE import_pages SET match_page_id = p.page_id FROM pages p
+        WHERE import_pages.match_page_id IS NULL AND p.is_deleted = 0
+          AND p.linked_account_id = import_pages.target_account_id AND p.page_name = import_pages.page_name
+    """)
+
+    source = _source_columns(cursor, 'pages', columns)
+    cursor.execute(f"""
+        UPDATE pages AS t SET {', '.join(f"{col} = {source[col]}" for col in columns)}, linked_account_id = i.target_account_id
+        FROM import_pages i
+        WHERE t.page_id = i.match_page_id AND i.target_account_id IS NOT NULL
+          AND ({_differs(columns)} OR t.linked_account_id IS NOT i.target_account_id)
+    """)
+    updated = cursor.rowcount
+    matched = cursor.execute("SELECT COUNT(*) FROM import_pages WHERE match_page_id IS NOT NULL AND target_account_id IS NOT NULL").fetchone()[0]
+    cursor.execute(f"""
+        INSERT INTO pages ({', '.join(columns)}, linked_account_id)
+        SELECT {', '.join(source[col] for col in columns)}, i.target_account_id FROM import_pages i
+        WHERE i.match_page_id IS NULL AND i.target_account_id IS NOT NULL
+    """)
+    inserted = cursor.rowcount
+    return {'total': total, 'inserted': inserted, 'updated': updated, 'unchanged': matched - updated,
+            'uid_conflicts': 0, 'skipped': total - matched - inserted}
+
+@queued_write
+def merge_import(accounts_rows, pages_rows, progress=None):
+    """
+    Merges backup rows (iterables of dicts, e.g. csv.DictReader) into the database in
+    one transaction. progress(table_name, rows_loaded) is called while loading.
+    Returns (True, {'accounts': counts, 'pages': counts}) where counts has total,
+    inserted, updated, unchanged, uid_conflicts (an account's uid is already taken
+    by another account) and skipped (duplicate in the backup, or no matching account).
+    """
+    try:
+        with transaction() as cursor:
+            report = {'accounts': _merge_accounts(cursor, accounts_rows, progress),
+                      'pages': _merge_pages(cursor, pages_rows, progress)}
+            cursor.execute("DROP TABLE IF EXISTS temp.import_pages")
+            cursor.execute("DROP TABLE IF EXISTS temp.import_accounts")
+        log.info(f"Merge import finished: {report}")
+        return (True, report)
+    except Exception as e:
+        log.error(f"Merge import failed: {e}")
+        return (False, str(e))
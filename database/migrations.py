@@ -0,0 +1,332 @@
+# database/migrations.py
+
+"""
+Numbered schema migrations tracked with PRAGMA user_version.
+
+Each migration is a list of SQL statements or a callable taking a cursor, and runs
+in its own transaction together with the user_version bump. Migrations must stay
+idempotent: databases created before versioning start at user_version 0 and replay
+all of them over their existing tables. Never edit or reorder a released
+migration; append a new one instead.
+"""
+
+import sqlite3
+from utils import log
+from . import connection
+
+# --- Full-Text Search ---
+# Trigram FTS5 indexes shadow the searchable columns so substring search does not
+# need a LIKE scan over every row. They are external-content tables kept in sync by triggers.
+FTS_TABLES = {
+    'accounts_fts': ('accounts', 'account_id', ['profile_id', 'account_name', 'uid', 'account_category', 'status', 'monetization', 'proxy', 'proxy_location', 'note']),
+    'pages_fts': ('pages', 'page_id', ['page_name', 'uid_page_id', 'category', 'note', 'followers', 'last_interaction'])
+}
+
+# --- Read Indexes ---
+# Partial indexes over live rows (is_deleted = 0) in the column order the read
+# queries filter and then sort by. Keep database/query_plan.py passing when editing.
+PERFORMANCE_INDEXES = [
+    # Covers ORDER BY profile_id paging, COUNT(*) and the (id, profile_id, name) pickers
+    "CREATE INDEX IF NOT EXISTS idx_accounts_live_profile ON accounts (profile_id, is_deleted, account_name) WHERE is_deleted = 0",
+    "CREATE INDEX IF NOT EXISTS idx_accounts_live_category ON accounts (account_category, profile_id) WHERE is_deleted = 0",
+    "CREATE INDEX IF NOT EXISTS idx_accounts_deleted ON accounts (profile_id, account_name) WHERE is_deleted = 1",
+    "CREATE INDEX IF NOT EXISTS idx_pages_live_account ON pages (linked_account_id, page_name) WHERE is_deleted = 0",
+    "CREATE INDEX IF NOT EXISTS idx_pages_live_category ON pages (category) WHERE is_deleted = 0",
+    "CREATE INDEX IF NOT EXISTS idx_pages_deleted ON pages (page_name) WHERE is_deleted = 1",
+    # The UNIQUE constraint on profile_id already indexes every row
+    "DROP INDEX IF EXISTS idx_accounts_profile_id"
+]
+
+def _create_base_tables(cursor):
+    """Creates accounts and pages, adding columns that older databases are missing."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS accounts (
+            account_id INTEGER PRIMARY KEY AUTOINCREMENT, profile_id TEXT NOT NULL UNIQUE,
+            account_name TEXT NOT NULL, uid TEXT UNIQUE, account_category TEXT,
+            status TEXT, monetization TEXT, proxy TEXT, proxy_location TEXT,
+            is_deleted INTEGER DEFAULT 0, note TEXT DEFAULT ''
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pages (
+            page_id INTEGER PRIMARY KEY AUTOINCREMENT, page_name TEXT NOT NULL,
+            uid_page_id TEXT, category TEXT, content_folder TEXT, used_folders TEXT,
+            video_schedule_date TEXT, video_posts_per_day INTEGER,
+            reels_schedule_date TEXT, reels_posts_per_day INTEGER,
+            photo_schedule_date TEXT, photo_posts_per_day INTEGER,
+            note TEXT, status TEXT, monetization TEXT, is_deleted INTEGER DEFAULT 0,
+            linked_account_id INTEGER,
+            video_folder TEXT, reels_folder TEXT, photo_folder TEXT,
+            followers TEXT, last_interaction TEXT,
+            FOREIGN KEY (linked_account_id) REFERENCES accounts (account_id) ON DELETE CASCADE
+        )
+    ''')
+
+    account_columns = [col[1] for col in cursor.execute("PRAGMA table_info(accounts)").fetchall()]
+    if 'note' not in account_columns:
+        cursor.execute("ALTER TABLE accounts ADD COLUMN note TEXT DEFAULT ''")
+
+    page_columns = [col[1] for col in cursor.execute("PRAGMA table_info(pages)").fetchall()]
+    columns_to_add = {
+        'video_folder': 'TEXT', 'reels_folder': 'TEXT', 'photo_folder': 'TEXT',
+        'followers': 'TEXT', 'last_interaction': 'TEXT'
+    }
+    for col, col_type in columns_to_add.items():
+        if col not in page_columns:
+            cursor.execute(f"ALTER TABLE pages ADD COLUMN {col} {col_type}")
+
+def _create_fts_tables(cursor):
+    """Creates the trigram FTS5 tables and their sync triggers, backfilling new indexes."""
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')")
+        cursor.execute("DROP TABLE temp.fts_probe")
+    except sqlite3.OperationalError as e:
+        # Skipped for good on this build; search keeps using LIKE
+        log.warning(f"Full-text search unavailable, falling back to LIKE search: {e}")
+        return
+
+    for fts_table, (table, key, columns) in FTS_TABLES.items():
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts_table,)).fetchone()
+        col_list = ', '.join(columns)
+        new_values = ', '.join(f"new.{col}" for col in columns)
+        old_values = ', '.join(f"old.{col}" for col in columns)
+
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({col_list}, content='{table}', content_rowid='{key}', tokenize='trigram')")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table} (rowid, {col_list}) VALUES (new.{key}, {new_values});
+            END""")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {col_list}) VALUES ('delete', old.{key}, {old_values});
+            END""")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {col_list} ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {col_list}) VALUES ('delete', old.{key}, {old_values});
+                INSERT INTO {fts_table} (rowid, {col_list}) VALUES (new.{key}, {new_values});
+            END""")
+        if not exists:
+            log.info(f"Building full-text index '{fts_table}'...")
+            cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+def _create_page_count_table(cursor):
+    """Creates the per-account live page counter and the triggers that maintain it."""
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'account_page_counts'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS account_page_counts (
+            account_id INTEGER PRIMARY KEY REFERENCES accounts (account_id) ON DELETE CASCADE,
+            page_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Only pages with is_deleted = 0 are counted
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS page_counts_ai AFTER INSERT ON pages
+        WHEN new.is_deleted = 0 AND new.linked_account_id IS NOT NULL BEGIN
+            INSERT INTO account_page_counts (account_id, page_count) VALUES (new.linked_account_id, 1)
+                ON CONFLICT (account_id) DO UPDATE SET page_count = page_count + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS page_counts_ad AFTER DELETE ON pages
+        WHEN old.is_deleted = 0 AND old.linked_account_id IS NOT NULL BEGIN
+            UPDATE account_page_counts SET page_count = page_count - 1 WHERE account_id = old.linked_account_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS page_counts_au AFTER UPDATE OF is_deleted, linked_account_id ON pages
+        WHEN (old.is_deleted = 0) IS NOT (new.is_deleted = 0) OR old.linked_account_id IS NOT new.linked_account_id BEGIN
+            UPDATE account_page_counts SET page_count = page_count - 1
+                WHERE old.is_deleted = 0 AND account_id = old.linked_account_id;
+            INSERT INTO account_page_counts (account_id, page_count)
+                SELECT new.linked_account_id, 1 WHERE new.is_deleted = 0 AND new.linked_account_id IS NOT NULL
+                ON CONFLICT (account_id) DO UPDATE SET page_count = page_count + 1;
+        END
+    ''')
+    if not exists:
+        cursor.execute('''
+            INSERT INTO account_page_counts (account_id, page_count)
+            SELECT linked_account_id, COUNT(*) FROM pages
+            WHERE is_deleted = 0 AND linked_account_id IN (SELECT account_id FROM accounts)
+            GROUP BY linked_account_id
+        ''')
+
+# --- Typed Shadow Columns ---
+# followers, last_interaction and the schedule dates stay free text for display.
+# Triggers keep a numeric copy of each in sync so they sort and range-filter in SQL.
+_FOLLOWERS_COUNT_SQL = """(SELECT CASE
+        WHEN v IS NULL OR v NOT GLOB '[0-9.]*' THEN NULL
+        WHEN v GLOB '*K' THEN CAST(ROUND(CAST(substr(v, 1, length(v) - 1) AS REAL) * 1000) AS INTEGER)
+        WHEN v GLOB '*M' THEN CAST(ROUND(CAST(substr(v, 1, length(v) - 1) AS REAL) * 1000000) AS INTEGER)
+        WHEN v GLOB '*B' THEN CAST(ROUND(CAST(substr(v, 1, length(v) - 1) AS REAL) * 1000000000) AS INTEGER)
+        ELSE CAST(ROUND(CAST(v AS REAL)) AS INTEGER)
+    END FROM (SELECT upper(replace(replace(trim({column}), ',', ''), ' ', '')) AS v))"""
+
+# shadow column -> (source column, SQL expression template)
+SHADOW_COLUMNS = {
+    'followers_count': ('followers', _FOLLOWERS_COUNT_SQL),
+    'last_interaction_jd': ('last_interaction', "julianday(trim({column}))"),
+    'video_schedule_jd': ('video_schedule_date', "julianday(trim({column}))"),
+    'reels_schedule_jd': ('reels_schedule_date', "julianday(trim({column}))"),
+    'photo_schedule_jd': ('photo_schedule_date', "julianday(trim({column}))")
+}
+SHADOW_COLUMN_TYPES = {'followers_count': 'INTEGER', 'last_interaction_jd': 'REAL',
+                       'video_schedule_jd': 'REAL', 'reels_schedule_jd': 'REAL', 'photo_schedule_jd': 'REAL'}
+
+def _shadow_assignments(prefix=''):
+    return ', '.join(f"{shadow} = {template.format(column=prefix + source)}"
+                     for shadow, (source, template) in SHADOW_COLUMNS.items())
+
+def _create_shadow_columns(cursor):
+    """Adds the typed shadow columns to pages with their sync triggers, indexes and backfill."""
+    page_columns = [col[1] for col in cursor.execute("PRAGMA table_info(pages)").fetchall()]
+    for shadow, col_type in SHADOW_COLUMN_TYPES.items():
+        if shadow not in page_columns:
+            cursor.execute(f"ALTER TABLE pages ADD COLUMN {shadow} {col_type}")
+
+    sources = ', '.join(source for source, _ in SHADOW_COLUMNS.values())
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pages_shadow_ai AFTER INSERT ON pages BEGIN
+            UPDATE pages SET {_shadow_assignments('new.')} WHERE page_id = new.page_id;
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pages_shadow_au AFTER UPDATE OF {sources} ON pages BEGIN
+            UPDATE pages SET {_shadow_assignments('new.')} WHERE page_id = new.page_id;
+        END""")
+    for shadow in SHADOW_COLUMNS:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_pages_live_{shadow} ON pages ({shadow}) WHERE is_deleted = 0")
+    cursor.execute(f"UPDATE pages SET {_shadow_assignments()}")
+
+# --- Folder History ---
+# page_folders is the source of truth for the folders a page has used. CSV backups export
+# it as its own file. pages.used_folders stays as a JSON mirror; inserted pages seed the
+# table from it, which is all that older backups and merge imports have.
+_SEED_PAGE_FOLDERS_SQL = """
+    INSERT OR IGNORE INTO page_folders (page_id, folder)
+    SELECT {page_id}, trim(j.value) FROM json_each(CASE WHEN json_valid({used_folders}) AND json_type({used_folders}) = 'array' THEN {used_folders} ELSE '[]' END) j
+    WHERE j.type = 'text' AND trim(j.value) != ''"""
+
+def _create_page_folders(cursor):
+    """Creates the page_folders history table and backfills it from pages.used_folders."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_folders (
+            page_id INTEGER NOT NULL REFERENCES pages (page_id) ON DELETE CASCADE,
+            folder TEXT NOT NULL,
+            content_type TEXT,
+            first_used TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (page_id, folder)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_folders_folder ON page_folders (folder)")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS page_folders_ai AFTER INSERT ON pages
+        WHEN new.used_folders IS NOT NULL BEGIN
+            {_SEED_PAGE_FOLDERS_SQL.format(page_id='new.page_id', used_folders='new.used_folders')};
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS page_folders_au AFTER UPDATE OF used_folders ON pages
+        WHEN new.used_folders IS NOT NULL BEGIN
+            {_SEED_PAGE_FOLDERS_SQL.format(page_id='new.page_id', used_folders='new.used_folders')};
+        END""")
+    cursor.execute(_SEED_PAGE_FOLDERS_SQL.replace("FROM json_each", "FROM pages p, json_each").format(page_id='p.page_id', used_folders='p.used_folders'))
+
+# --- Change Log ---
+# Every insert, update and delete on accounts and pages appends (table_name, row_id, op)
+# so other app instances sharing the file can fetch just what changed.
+CHANGELOG_TABLES = {'accounts': 'account_id', 'pages': 'page_id'}
+
+def _create_changelog(cursor):
+    """Creates the changelog table and the triggers that feed it."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_changelog_changed_at ON changelog (changed_at)")
+    for table, key in CHANGELOG_TABLES.items():
+        # Shadow columns are written by their own trigger after every insert; skip those updates
+        columns = [col[1] for col in cursor.execute(f"PRAGMA table_info({table})").fetchall()
+                   if col[1] != key and col[1] not in SHADOW_COLUMNS]
+        for op, event, ref in (('insert', 'INSERT', 'new'), ('update', f"UPDATE OF {', '.join(columns)}", 'new'), ('delete', 'DELETE', 'old')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_changelog_{op} AFTER {event} ON {table} BEGIN
+                    INSERT INTO changelog (table_name, row_id, op) VALUES ('{table}', {ref}.{key}, '{op}');
+                END""")
+
+# (version, description, statements or callable). user_version holds the last one applied.
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "base indexes", ["CREATE INDEX IF NOT EXISTS idx_pages_linked_account_id ON pages (linked_account_id)"]),
+    (3, "full-text search", _create_fts_tables),
+    (4, "account page counts", _create_page_count_table),
+    (5, "partial read indexes", PERFORMANCE_INDEXES),
+    (6, "typed follower and date columns", _create_shadow_columns),
+    (7, "page folder history", _create_page_folders),
+    (8, "change log", _create_changelog),
+    # Resolves pasted profile ids regardless of case, as in bulk_add_pages
+    (9, "case-insensitive profile id index", [
+        "CREATE INDEX IF NOT EXISTS idx_accounts_live_profile_nocase ON accounts (profile_id COLLATE NOCASE) WHERE is_deleted = 0"
+    ]),
+    # Filled per connection by connection._tag_own_changes, so an instance can skip its own changes
+    (10, "change log origin", ["ALTER TABLE changelog ADD COLUMN origin TEXT"])
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_SCHEMA_STATE_QUERY = "SELECT user_version, EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'accounts_fts') FROM pragma_user_version"
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn, target_version=SCHEMA_VERSION):
+    """
+    Applies every migration above the database's user_version up to target_version,
+    each in its own transaction. Returns (success, version reached).
+    """
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        log.warning(f"Database schema version {version} is newer than this app ({SCHEMA_VERSION}).")
+    for number, description, steps in MIGRATIONS:
+        if number <= version or number > target_version:
+            continue
+        log.info(f"Applying database migration {number}: {description}...")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            if callable(steps):
+                steps(cursor)
+            else:
+                for statement in steps:
+                    cursor.execute(statement)
+            cursor.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            log.error(f"Database migration {number} ({description}) failed: {e}")
+            return (False, version)
+        version = number
+    return (True, version)
+
+def create_tables():
+    """
+    Brings the schema up to date. When it already is, this is a single query
+    reading user_version and whether the FTS indexes exist.
+    """
+    conn = connection.get_connection()
+    if not conn:
+        log.error("Schema migration skipped: database connection failed.")
+        return (False, "Database connection failed.")
+    try:
+        version, has_fts = conn.execute(_SCHEMA_STATE_QUERY).fetchone()
+        success = True
+        if version < SCHEMA_VERSION:
+            success, version = run_migrations(conn)
+            has_fts = conn.execute(_SCHEMA_STATE_QUERY).fetchone()[1]
+            connection._tag_own_changes(conn) # The connection opened before changelog.origin existed
+        connection._fts_enabled = bool(has_fts)
+    except sqlite3.Error as e:
+        log.error(f"Schema migration failed: {e}")
+        return (False, str(e))
+    return (success, version)
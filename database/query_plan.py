@@ -0,0 +1,233 @@
+# database/query_plan.py
+
+"""
+Query-plan verification for the read queries in database/read.py.
+
+Builds a large synthetic database with the application's own schema, runs every
+public read function with statement tracing on, and checks the EXPLAIN QUERY PLAN
+of each captured SELECT for full table scans and temp B-tree sorts.
+
+Run from the project root (exits non-zero on any problem):
+    python -m database.query_plan [num_accounts] [num_pages]
+
+Without arguments every size in QUERY_PLAN_SIZES is checked, since SQLite's
+choice of plan can change with table size.
+"""
+
+import inspect
+import os
+import random
+import reprlib
+import shutil
+import sys
+import tempfile
+from utils import log
+from . import connection, migrations, read
+
+FULL_SCAN = 'full table scan'
+TEMP_BTREE = 'temp b-tree'
+MANY_IDS = list(range(1, connection.ID_LIST_TEMP_TABLE_THRESHOLD * 4)) # Goes through a temp id table
+QUERY_PLAN_SIZES = [(5000, 15000), (50000, 150000)] # (accounts, pages) per synthetic database
+
+class SeqBeforeLatest:
+    """A case argument resolved when the case runs: the changelog seq this many entries before the latest."""
+    def __init__(self, entries):
+        self.entries = entries
+
+    def resolve(self, conn):
+        latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog").fetchone()[0]
+        return max(latest - self.entries, 0)
+
+    def __repr__(self):
+        return f"<latest seq - {self.entries}>"
+
+# (read function, args, kwargs, findings that are expected for this case)
+READ_CASES = [
+    ('get_table_data_for_export', ('accounts',), {}, {FULL_SCAN}), # Exports every live row by design
+    ('get_table_data_for_export', ('pages',), {}, {FULL_SCAN}),
+    ('iter_table_data_for_export', ('pages',), {}, {FULL_SCAN}),
+    ('iter_table_data_for_export', ('page_folders',), {}, {FULL_SCAN}),
+    ('get_all_accounts_data', (), {'limit': 100}, set()),
+    ('get_all_accounts_data', (), {'limit': 100, 'after_profile_id': 'P0025000'}, set()),
+    ('get_all_accounts_data', (), {'account_category_filter': 'Category 3', 'limit': 100}, set()),
+    ('get_all_accounts_data', (), {'account_category_filter': 'Category 3', 'limit': 100, 'after_profile_id': 'P0025000'}, set()),
+    ('get_all_accounts_data', ('na',), {'limit': 100}, set()),
+    # FTS returns matches in rank order, so putting them in profile_id order takes a sort of the matches
+    ('get_all_accounts_data', ('name 12',), {'limit': 100}, {TEMP_BTREE}),
+    # The matches are probed against a short IN list, which gives no profile_id order either
+    ('get_all_accounts_data', ('name 12',), {'limit': 100, 'account_ids_to_include': [1, 2, 3]}, {TEMP_BTREE}),
+    # The same with the ids in a temp table, joined by rowid
+    ('get_all_accounts_data', ('name 12',), {'limit': 100, 'account_ids_to_include': MANY_IDS}, {TEMP_BTREE}),
+    ('get_total_accounts_count', (), {}, set()),
+    ('get_total_accounts_count', (), {'account_category_filter': 'Category 3'}, set()),
+    ('get_total_accounts_count', ('name 12',), {}, set()),
+    ('get_all_pages_data', (), {}, set()),
+    ('get_all_pages_data', ('page 12',), {}, set()),
+    ('get_all_pages_data', (), {'page_category_filter': 'Category 3'}, set()),
+    ('get_all_pages_data', (), {'sort_by': 'followers'}, set()),
+    ('get_all_pages_data', (), {'sort_by': 'video_ends'}, set()),
+    ('get_all_pages_data', (), {'sort_by': 'followers', 'min_followers': 100000, 'max_followers': 200000}, set()),
+    # Pages are looked up by rowid from the temp id table, in id order rather than page_name order
+    ('get_all_pages_data', (), {'page_ids': MANY_IDS}, {TEMP_BTREE}),
+    # Pages come from idx_pages_linked_account one account at a time, so the name order spans accounts
+    ('get_all_pages_data', (), {'account_ids': [1, 2, 3]}, {TEMP_BTREE}),
+    # A followers range is read in followers order; the default page_name order needs a sort
+    ('get_all_pages_data', (), {'min_followers': 900000}, {TEMP_BTREE}),
+    # The UNION of schedule probes yields page_ids in id order, so the matching pages are sorted by name
+    ('get_all_pages_data', (), {'schedule_ends_before': '2024-01-15'}, {TEMP_BTREE}),
+    ('get_account_details', (1,), {}, set()),
+    ('get_page_details_for_edit', (1,), {}, set()),
+    ('get_all_accounts', (), {}, set()),
+    ('get_unique_page_categories', (), {}, set()),
+    ('get_unique_account_categories', (), {}, set()),
+    ('get_profile_id_map', (), {}, set()),
+    ('find_account_by_profile_id', ('P0000012',), {}, set()),
+    ('find_account_by_profile_id', ('p0000012',), {}, set()),
+    ('find_accounts_by_profile_ids', (['P0000001', 'p0000002', 'missing'],), {}, set()),
+    ('get_deleted_items', (), {}, set()),
+    ('get_dependent_pages_count', ([1, 2, 3],), {}, set()),
+    ('get_dependent_pages_count', (MANY_IDS,), {}, set()),
+    ('check_duplicate', ('P0000001', 'uid-1'), {}, set()),
+    ('check_duplicate', ('P9999999', ''), {}, set()),
+    ('check_import_duplicates', ([('P0000001', 'uid-1'), ('new-1', 'uid-2'), ('new-1', ''), None],), {}, set()),
+    ('get_multiple_accounts_details', ([1, 2, 3],), {}, set()),
+    ('get_multiple_accounts_details', (MANY_IDS,), {}, set()),
+    ('get_accounts_for_proxy_edit', ([1, 2, 3],), {}, set()),
+    ('get_multiple_pages_details', ([1, 2, 3],), {}, set()),
+    ('get_multiple_pages_details', (MANY_IDS,), {}, set()),
+    # The primary key keeps one page's folders in folder order; first-use order sorts those few rows
+    ('get_used_folders', (1,), {}, {TEMP_BTREE}),
+    # idx_page_folders_folder gives one folder's pages in rowid order; first-use order sorts those rows
+    ('get_pages_using_folder', ('D:/content/folder 7',), {}, {TEMP_BTREE}),
+    ('get_data_version', (), {}, set()),
+    ('get_latest_change_seq', (), {}, set()),
+    # The entries after the seq are read in seq order and grouped per row, which needs a sort
+    ('get_changes_since', (SeqBeforeLatest(1000),), {}, {TEMP_BTREE}),
+    ('get_changes_since', (SeqBeforeLatest(1000),), {'skip_own': True}, {TEMP_BTREE})
+]
+
+def build_synthetic_database(path, num_accounts=50000, num_pages=150000, seed=7):
+    """Creates a database at path with the app schema and realistic-looking random rows."""
+    rng = random.Random(seed)
+    categories = [f"Category {i}" for i in range(40)]
+    statuses = ['Created', 'Imported', 'Details Updated', 'Bulk Updated']
+
+    connection.DATABASE_NAME = path
+    connection.close_all_connections()
+    migrations.create_tables()
+    with connection.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO accounts (profile_id, account_name, uid, account_category, status, proxy, is_deleted, note) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((f"P{i:07d}", f"Account name {i}", f"uid-{i}", rng.choice(categories), rng.choice(statuses),
+              f"10.0.{i % 256}.{i % 200}:8080", int(rng.random() < 0.05), '') for i in range(1, num_accounts + 1)))
+        cursor.executemany(
+            "INSERT INTO pages (page_name, uid_page_id, category, status, linked_account_id, is_deleted, followers) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((f"Page {i}", f"pg-{i}", rng.choice(categories), rng.choice(statuses), rng.randint(1, num_accounts),
+              int(rng.random() < 0.05), f"{rng.randint(1, 999)}K") for i in range(1, num_pages + 1)))
+        cursor.execute("UPDATE pages SET used_folders = json_array('D:/content/folder ' || (page_id % 500)) WHERE page_id % 2 = 0")
+        cursor.execute("UPDATE pages SET video_schedule_date = date('2024-01-01', '+' || (page_id % 365) || ' days') WHERE page_id % 3 = 0")
+
+def _public_read_functions():
+    return {name for name, func in inspect.getmembers(read, inspect.isfunction)
+            if func.__module__ == read.__name__ and not name.startswith('_')}
+
+def _case_label(func_name, args, kwargs):
+    label = f"{func_name}{reprlib.repr(args)}"
+    return f"{label} {reprlib.repr(kwargs)}" if kwargs else label
+
+def find_plan_problems(plan_details, temp_tables=()):
+    """
+    Returns (kind, detail) for every full table scan or temp B-tree step in a plan.
+    Scans of temp_tables (the id lists from _ids_condition) are expected.
+    """
+    problems = []
+    for detail in plan_details:
+        scanned = detail.split()[1] if detail.startswith('SCAN ') else None
+        if scanned and scanned not in temp_tables and ' INDEX' not in detail and 'VIRTUAL TABLE' not in detail:
+            problems.append((FULL_SCAN, detail))
+        elif detail.startswith('USE TEMP B-TREE'):
+            problems.append((TEMP_BTREE, detail))
+    return problems
+
+def collect_query_plans(cases=READ_CASES):
+    """Runs each case with tracing on and returns (case label, sql, plan details, temp tables) per SELECT issued."""
+    conn = connection.get_connection()
+    results = []
+    for func_name, args, kwargs, _ in cases:
+        statements = []
+        resolved = [arg.resolve(conn) if isinstance(arg, SeqBeforeLatest) else arg for arg in args]
+        conn.set_trace_callback(statements.append)
+        try:
+            getattr(read, func_name)(*resolved, **kwargs)
+        finally:
+            conn.set_trace_callback(None)
+        label = _case_label(func_name, args, kwargs)
+        for sql in statements:
+            if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue # Skips pragmas and FTS5's internal statements
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            temp_tables = {row[0] for row in conn.execute("SELECT name FROM temp.sqlite_master WHERE type = 'table'")}
+            results.append((label, sql, plan, temp_tables))
+    return results
+
+def _check_cases(cases, stage):
+    report, failed = [], False
+    allowed_by_label = {}
+    for func_name, args, kwargs, allowed in cases:
+        allowed_by_label[_case_label(func_name, args, kwargs)] = allowed
+    for label, sql, plan, temp_tables in collect_query_plans(cases):
+        problems = [(kind, detail) for kind, detail in find_plan_problems(plan, temp_tables) if kind not in allowed_by_label[label]]
+        if problems:
+            failed = True
+            report.append(f"FAIL [{stage}] {label}")
+            report.append(f"    {' '.join(sql.split())[:200]}")
+            report.extend(f"    {kind}: {detail}" for kind, detail in problems)
+        else:
+            report.append(f"ok   [{stage}] {label}")
+    return failed, report
+
+def verify_query_plans(sizes=QUERY_PLAN_SIZES, cases=READ_CASES):
+    """
+    Builds a synthetic database of each (num_accounts, num_pages) size and checks
+    every read.py query plan, both before and after ANALYZE. Returns (success, report_lines).
+    """
+    report = []
+    uncovered = _public_read_functions() - {case[0] for case in cases}
+    for name in sorted(uncovered):
+        report.append(f"FAIL read.{name} has no query-plan case in READ_CASES")
+
+    original_db = connection.DATABASE_NAME
+    original_fts = connection._fts_enabled
+    work_dir = tempfile.mkdtemp(prefix='query_plan_')
+    failed = bool(uncovered)
+    try:
+        for num_accounts, num_pages in sizes:
+            size = f"{num_accounts}/{num_pages}"
+            build_synthetic_database(os.path.join(work_dir, f"synthetic_{size.replace('/', '_')}.db"), num_accounts, num_pages)
+            failed_fresh, fresh_report = _check_cases(cases, f"{size} no stats")
+            connection.get_connection().execute("ANALYZE")
+            failed_analyzed, analyzed_report = _check_cases(cases, f"{size} analyzed")
+            report.extend(fresh_report + analyzed_report)
+            failed = failed or failed_fresh or failed_analyzed
+        return (not failed, report)
+    except Exception as e:
+        log.error(f"Query plan verification failed: {e}")
+        report.append(f"ERROR {e}")
+        return (False, report)
+    finally:
+        connection.close_all_connections()
+        connection.DATABASE_NAME = original_db
+        connection._fts_enabled = original_fts
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        num_accounts = int(sys.argv[1])
+        num_pages = int(sys.argv[2]) if len(sys.argv) > 2 else num_accounts * 3
+        sizes = [(num_accounts, num_pages)]
+    else:
+        sizes = QUERY_PLAN_SIZES
+    success, lines = verify_query_plans(sizes)
+    print('\n'.join(lines))
+    print("All query plans OK." if success else "Query plan problems found.")
+    sys.exit(0 if success else 1)
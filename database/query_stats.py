@@ -0,0 +1,113 @@
+# database/query_stats.py
+
+"""
+Opt-in query instrumentation for the connection layer.
+
+Statements are grouped by fingerprint: the SQL with literals and parameters
+replaced by ?. Calls through _execute_query are counted with their wall time and
+row count, and those slower than the threshold are written to the slow-query log.
+Everything else (transaction() blocks, direct connection use, FTS5's internal
+statements) is counted by a trace callback on each pooled connection, without
+timings. SQLite reports such a statement again for each trigger it fires.
+
+Reset the statistics, perform a UI action, then read them to see which queries
+that action spent its time in.
+"""
+
+import logging
+import re
+import reprlib
+import threading
+from logging.handlers import RotatingFileHandler
+
+SLOW_QUERY_LOG = 'slow_queries.log'
+DEFAULT_SLOW_QUERY_MS = 200
+MAX_FINGERPRINTS = 2000 # Anything past this is counted under OTHER_FINGERPRINT
+OTHER_FINGERPRINT = '(other statements)'
+
+_lock = threading.Lock()
+_local = threading.local() # timing: inside _execute_query, where the trace would double count
+_enabled = False
+_slow_query_seconds = DEFAULT_SLOW_QUERY_MS / 1000
+_stats = {} # fingerprint -> [executions, timed calls, total seconds, max seconds, rows]
+
+_slow_log = logging.getLogger('slow_queries')
+_slow_log.setLevel(logging.INFO)
+_slow_log.propagate = False
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"\?\d*|[:@$][A-Za-z_]\w*")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(sql):
+    """Normalizes SQL so that executions differing only in values or id-list length group together."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _PARAMETER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _VALUE_LIST.sub('(?, ...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+def is_enabled():
+    return _enabled
+
+def configure_query_stats(enabled, slow_query_ms=DEFAULT_SLOW_QUERY_MS):
+    """Turns collection on or off. Each thread's connection picks this up on its next query."""
+    global _enabled, _slow_query_seconds
+    try:
+        _slow_query_seconds = max(float(slow_query_ms), 0) / 1000
+    except (TypeError, ValueError):
+        _slow_query_seconds = DEFAULT_SLOW_QUERY_MS / 1000
+    if enabled and not _slow_log.handlers:
+        handler = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=5*1024*1024, backupCount=2)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(threadName)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        _slow_log.addHandler(handler)
+    _enabled = bool(enabled)
+
+def _entry(key):
+    entry = _stats.get(key)
+    if entry is None:
+        if len(_stats) >= MAX_FINGERPRINTS:
+            key = OTHER_FINGERPRINT
+        entry = _stats.setdefault(key, [0, 0, 0.0, 0.0, 0])
+    return entry
+
+def set_timing(timing):
+    """Marks this thread as inside a timed _execute_query call, which counts itself."""
+    _local.timing = timing
+
+def trace_statement(sql):
+    """Trace callback for the pooled connections: counts one execution of an untimed statement."""
+    if not _enabled or getattr(_local, 'timing', False):
+        return
+    key = fingerprint(sql)
+    with _lock:
+        _entry(key)[0] += 1
+
+def record_query(sql, params, seconds, rows):
+    """Adds one timed _execute_query call; logs it if it was slower than the threshold."""
+    key = fingerprint(sql)
+    with _lock:
+        entry = _entry(key)
+        entry[0] += 1
+        entry[1] += 1
+        entry[2] += seconds
+        entry[3] = max(entry[3], seconds)
+        entry[4] += rows
+    if seconds >= _slow_query_seconds:
+        _slow_log.info(f"{seconds * 1000:.1f} ms, {rows} rows: {_WHITESPACE.sub(' ', sql).strip()} | params: {reprlib.repr(params)}")
+
+def get_query_stats():
+    """Returns one dict per fingerprint (fingerprint, executions, timed, total_ms, avg_ms, max_ms, rows), most total time first."""
+    with _lock:
+        items = [(key, list(entry)) for key, entry in _stats.items()]
+    stats = [{'fingerprint': key, 'executions': executions, 'timed': timed, 'total_ms': total * 1000,
+              'avg_ms': total * 1000 / timed if timed else 0.0, 'max_ms': longest * 1000, 'rows': rows}
+             for key, (executions, timed, total, longest, rows) in items]
+    stats.sort(key=lambda row: (row['total_ms'], row['executions']), reverse=True)
+    return stats
+
+def reset_query_stats():
+    with _lock:
+        _stats.clear()
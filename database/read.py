@@ -1,47 +1,112 @@
 # database/read.py
 
-from .connection import _execute_query, create_connection
+from .connection import INSTANCE_ID, _execute_query, _ids_condition, get_connection, fts_enabled
+from .migrations import SHADOW_COLUMNS
+import json
 import sqlite3
 
-def get_table_data_for_export(table_name):
-    """Fetches all non-deleted records and column headers for a given table."""
-    conn = create_connection() # --- THIS LINE IS NOW CORRECT ---
+ACCOUNT_SEARCH_COLUMNS = ['profile_id', 'account_name', 'uid', 'account_category', 'status', 'monetization', 'proxy', 'proxy_location', 'note']
+PAGE_SEARCH_COLUMNS = ['a.profile_id', 'p.page_name', 'p.uid_page_id', 'p.category', 'p.note', 'p.followers', 'p.last_interaction', 'a.account_name']
+FTS_MIN_TERM_LENGTH = 3 # The trigram tokenizer cannot match anything shorter
+# sort_by values for get_all_pages_data, each backed by an index on a typed shadow column
+PAGE_SORT_ORDERS = {
+    'followers': "p.followers_count DESC",
+    'followers_asc': "p.followers_count",
+    'last_interaction': "p.last_interaction_jd DESC",
+    'video_ends': "p.video_schedule_jd",
+    'reels_ends': "p.reels_schedule_jd",
+    'photo_ends': "p.photo_schedule_jd"
+}
+
+def _fts_phrase(search_term):
+    """Quotes a search term as a single FTS5 phrase so operators in it are matched literally."""
+    return '"' + search_term.replace('"', '""') + '"'
+
+def _use_fts(search_term):
+    return fts_enabled() and len(search_term) >= FTS_MIN_TERM_LENGTH
+
+def _account_search_condition(search_term):
+    """Returns (sql, params) matching accounts whose searchable columns contain the term."""
+    if _use_fts(search_term):
+        return "account_id IN (SELECT rowid FROM accounts_fts WHERE accounts_fts MATCH ?)", [_fts_phrase(search_term)]
+    term = f"%{search_term}%"
+    return f"({' OR '.join([f'{col} LIKE ?' for col in ACCOUNT_SEARCH_COLUMNS])})", [term] * len(ACCOUNT_SEARCH_COLUMNS)
+
+def _page_search_condition(search_term):
+    """Returns (sql, params) matching joined page rows (aliases p, a) that contain the term."""
+    if _use_fts(search_term):
+        phrase = _fts_phrase(search_term)
+        condition = ("(p.page_id IN (SELECT rowid FROM pages_fts WHERE pages_fts MATCH ?)"
+                     " OR a.account_id IN (SELECT rowid FROM accounts_fts WHERE accounts_fts MATCH ?))")
+        return condition, [phrase, f"{{profile_id account_name}} : {phrase}"]
+    term = f"%{search_term}%"
+    return f"({' OR '.join([f'{col} LIKE ?' for col in PAGE_SEARCH_COLUMNS])})", [term] * len(PAGE_SEARCH_COLUMNS)
+
+EXPORT_BATCH_SIZE = 2000 # Rows fetched per fetchmany() while streaming an export
+# Rows exported per table; tables without is_deleted follow their page
+EXPORT_FILTERS = {'page_folders': "page_id IN (SELECT page_id FROM pages WHERE is_deleted = 0)"}
+
+def _fetch_in_batches(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+def iter_table_data_for_export(table_name, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Like get_table_data_for_export, but returns (True, headers, rows) where rows is
+    an iterator fetching batch_size rows at a time. Consume it on the calling thread.
+    """
+    conn = get_connection()
     if not conn:
         return (False, "Database connection failed.", None)
     try:
         cursor = conn.cursor()
         cursor.execute(f"PRAGMA table_info({table_name})")
-        headers = [row[1] for row in cursor.fetchall()]
-        cursor.execute(f"SELECT * FROM {table_name} WHERE is_deleted = 0")
-        data = cursor.fetchall()
-        return (True, headers, data)
+        # Trigger-maintained shadow columns are rebuilt on import, so they are not exported
+        headers = [row[1] for row in cursor.fetchall() if row[1] not in SHADOW_COLUMNS]
+        cursor.execute(f"SELECT {', '.join(headers)} FROM {table_name} WHERE {EXPORT_FILTERS.get(table_name, 'is_deleted = 0')}")
+        return (True, headers, _fetch_in_batches(cursor, batch_size))
     except sqlite3.Error as e:
         return (False, str(e), None)
-    finally:
-        if conn:
-            conn.close()
 
-def get_all_accounts_data(search_term="", account_category_filter=None, limit=None, offset=0, account_ids_to_include=None):
+def get_table_data_for_export(table_name):
+    """Fetches all non-deleted records and column headers for a given table."""
+    success, headers, rows = iter_table_data_for_export(table_name)
+    if not success:
+        return (False, headers, None)
+    try:
+        return (True, headers, list(rows))
+    except sqlite3.Error as e:
+        return (False, str(e), None)
+
+def get_all_accounts_data(search_term="", account_category_filter=None, limit=None, offset=0, account_ids_to_include=None, after_profile_id=None):
     """
     Fetches accounts that either match the search term directly OR are in the
     provided list of IDs (e.g., from a page search).
+    Pass the last profile_id already loaded as after_profile_id to seek straight
+    to the next chunk instead of skipping earlier rows with OFFSET.
+    Each row is the accounts row followed by its live page count.
+    """
+    query = """
+        SELECT accounts.*, COALESCE((SELECT c.page_count FROM account_page_counts c
+                                     WHERE c.account_id = accounts.account_id), 0)
+        FROM accounts WHERE is_deleted = 0
     """
-    query = "SELECT * FROM accounts WHERE is_deleted = 0"
     params = []
     
     main_conditions = []
     
     if search_term:
-        term = f"%{search_term}%"
-        search_cols = ['profile_id', 'account_name', 'uid', 'account_category', 'status', 'monetization', 'proxy', 'proxy_location', 'note']
-        search_condition_str = f"({' OR '.join([f'{col} LIKE ?' for col in search_cols])})"
-        main_conditions.append(search_condition_str)
-        params.extend([term] * len(search_cols))
+        search_condition, search_params = _account_search_condition(search_term)
+        main_conditions.append(search_condition)
+        params.extend(search_params)
         
     if account_ids_to_include:
-        placeholders = ','.join(['?'] * len(account_ids_to_include))
-        main_conditions.append(f"account_id IN ({placeholders})")
-        params.extend(account_ids_to_include)
+        ids_condition, ids_params = _ids_condition('account_id', account_ids_to_include, 'include_account_ids')
+        main_conditions.append(ids_condition)
+        params.extend(ids_params)
 
     if main_conditions:
         query += " AND (" + " OR ".join(main_conditions) + ")"
@@ -50,6 +115,10 @@ def get_all_accounts_data(search_term="", account_category_filter=None, limit=No
         query += " AND account_category = ?"
         params.append(account_category_filter)
 
+    if after_profile_id is not None:
+        query += " AND profile_id > ?"
+        params.append(after_profile_id)
+
     query += " ORDER BY profile_id"
     if limit:
         query += " LIMIT ? OFFSET ?"
@@ -65,10 +134,9 @@ def get_total_accounts_count(search_term="", account_category_filter=None):
         conditions.append("account_category = ?")
         params.append(account_category_filter)
     if search_term:
-        term = f"%{search_term}%"
-        search_cols = ['profile_id', 'account_name', 'uid', 'account_category', 'status', 'monetization', 'proxy', 'proxy_location', 'note']
-        conditions.append(f"({' OR '.join([f'{col} LIKE ?' for col in search_cols])})")
-        params.extend([term] * len(search_cols))
+        search_condition, search_params = _account_search_condition(search_term)
+        conditions.append(search_condition)
+        params.extend(search_params)
     
     if conditions:
         query += " AND " + " AND ".join(conditions)
@@ -78,8 +146,22 @@ def get_total_accounts_count(search_term="", account_category_filter=None):
         return success, result
     return (True, result[0] if result else 0)
 
-def get_all_pages_data(search_term="", page_category_filter=None):
-    query = """
+def get_all_pages_data(search_term="", page_category_filter=None, sort_by=None, min_followers=None, max_followers=None, schedule_ends_before=None, page_ids=None, account_ids=None):
+    """
+    Fetches live pages with their account's profile_id and name (and the parsed
+    followers_count last, for numeric sorting in the tables), ordered by
+    account and page name unless sort_by names one of PAGE_SORT_ORDERS.
+    Follower bounds and schedule_ends_before ('yyyy-MM-dd', any content type)
+    filter on the typed shadow columns. page_ids and account_ids limit the result
+    to those pages or to the pages of those accounts.
+    """
+    # CROSS JOIN pins the outer loop: accounts when both indexes already return rows
+    # in (profile_id, page_name) order, pages when an id list or shadow-column index
+    # can narrow or order them instead
+    order_by = PAGE_SORT_ORDERS.get(sort_by)
+    typed_filter = min_followers is not None or max_followers is not None or schedule_ends_before or page_ids
+    join = "pages p CROSS JOIN accounts a" if order_by or typed_filter else "accounts a CROSS JOIN pages p"
+    query = f"""
         SELECT 
             p.page_id, p.page_name, p.uid_page_id, p.category, p.content_folder, 
             p.used_folders, p.video_schedule_date, p.video_posts_per_day,
@@ -87,8 +169,8 @@ def get_all_pages_data(search_term="", page_category_filter=None):
             p.photo_posts_per_day, p.note, p.status, p.monetization, p.is_deleted, 
             p.linked_account_id, p.video_folder, p.reels_folder, p.photo_folder, 
             p.followers, p.last_interaction,
-            a.profile_id, a.account_name
-        FROM pages p JOIN accounts a ON p.linked_account_id = a.account_id
+            a.profile_id, a.account_name, p.followers_count
+        FROM {join} ON p.linked_account_id = a.account_id
         WHERE p.is_deleted = 0 AND a.is_deleted = 0
     """
     params = []
@@ -96,14 +178,33 @@ def get_all_pages_data(search_term="", page_category_filter=None):
     if page_category_filter and page_category_filter != 'All Categories':
         conditions.append("p.category = ?")
         params.append(page_category_filter)
+    if page_ids:
+        ids_condition, ids_params = _ids_condition('p.page_id', page_ids, 'include_page_ids')
+        conditions.append(ids_condition)
+        params.extend(ids_params)
+    if account_ids:
+        ids_condition, ids_params = _ids_condition('a.account_id', account_ids, 'include_account_ids')
+        conditions.append(ids_condition)
+        params.extend(ids_params)
+    if min_followers is not None:
+        conditions.append("p.followers_count >= ?")
+        params.append(min_followers)
+    if max_followers is not None:
+        conditions.append("p.followers_count <= ?")
+        params.append(max_followers)
+    if schedule_ends_before:
+        # One range probe per shadow-column index; the planner will not reliably use them for an OR
+        probes = " UNION ".join(f"SELECT page_id FROM pages WHERE is_deleted = 0 AND {content}_schedule_jd < julianday(?)"
+                                for content in ('video', 'reels', 'photo'))
+        conditions.append(f"p.page_id IN ({probes})")
+        params.extend([schedule_ends_before] * 3)
     if search_term:
-        term = f"%{search_term}%"
-        search_cols = ['a.profile_id', 'p.page_name', 'p.uid_page_id', 'p.category', 'p.note', 'p.followers', 'p.last_interaction', 'a.account_name']
-        conditions.append(f"({' OR '.join([f'{col} LIKE ?' for col in search_cols])})")
-        params.extend([term] * len(search_cols))
+        search_condition, search_params = _page_search_condition(search_term)
+        conditions.append(search_condition)
+        params.extend(search_params)
     if conditions:
         query += " AND " + " AND ".join(conditions)
-    query += " ORDER BY a.profile_id, p.page_name"
+    query += f" ORDER BY {order_by or 'a.profile_id, p.page_name'}"
     return _execute_query(query, tuple(params), fetch='all')
 
 def get_account_details(account_id):
@@ -112,6 +213,22 @@ def get_account_details(account_id):
 def get_page_details_for_edit(page_id):
     return _execute_query("SELECT * FROM pages WHERE page_id = ?", (page_id,), fetch='one')
 
+def get_used_folders(page_id):
+    """Returns the folders a page has used, oldest first."""
+    success, rows = _execute_query("SELECT folder FROM page_folders WHERE page_id = ? ORDER BY first_used, rowid", (page_id,), fetch='all')
+    if not success: return success, rows
+    return (True, [row[0] for row in rows])
+
+def get_pages_using_folder(folder):
+    """Returns (page_id, page_name, content_type, first_used) for live pages that have used the folder."""
+    query = """
+        SELECT p.page_id, p.page_name, f.content_type, f.first_used
+        FROM page_folders f JOIN pages p ON p.page_id = f.page_id
+        WHERE f.folder = ? AND p.is_deleted = 0
+        ORDER BY f.first_used
+    """
+    return _execute_query(query, (folder,), fetch='all')
+
 def get_all_accounts():
     query = "SELECT account_id, profile_id, account_name FROM accounts WHERE is_deleted = 0 ORDER BY profile_id"
     return _execute_query(query, fetch='all')
@@ -133,6 +250,41 @@ def get_profile_id_map():
     if not success: return success, rows
     return (True, {row[0].upper(): (row[0], row[1]) for row in rows} if rows else {})
 
+def find_account_by_profile_id(profile_id):
+    """
+    Looks up a live account by profile_id, ignoring case (an exact-case match wins).
+    Returns (True, (account_id, profile_id, account_name)) or (True, None) if there is none.
+    """
+    profile_id = (profile_id or '').strip()
+    # The UNIQUE index answers an exact match, the NOCASE index any other (lowest account_id), without sorting
+    success, row = _execute_query("SELECT account_id, profile_id, account_name FROM accounts WHERE profile_id = ? AND is_deleted = 0",
+                                  (profile_id,), fetch='one')
+    if not success or row: return success, row
+    success, row = _execute_query("SELECT MIN(account_id), profile_id, account_name FROM accounts WHERE profile_id = ? COLLATE NOCASE AND is_deleted = 0",
+                                  (profile_id,), fetch='one')
+    if not success: return success, row
+    return (True, row if row[0] is not None else None)
+
+def find_accounts_by_profile_ids(profile_ids):
+    """
+    Bulk form of find_account_by_profile_id in one query. Returns
+    (True, {requested id: (account_id, profile_id, account_name)}) for the ids that exist.
+    """
+    requested = sorted({(profile_id or '').strip() for profile_id in profile_ids} - {''})
+    query = """
+        SELECT j.value, a.account_id, a.profile_id, a.account_name FROM json_each(?) j
+        JOIN accounts a ON a.profile_id = j.value COLLATE NOCASE AND a.is_deleted = 0
+    """
+    success, rows = _execute_query(query, (json.dumps(requested),), fetch='all')
+    if not success: return success, rows
+    found = {}
+    for requested_id, account_id, profile_id, account_name in rows:
+        best = found.get(requested_id)
+        # Same preference as the point lookup: exact case, then the lowest account_id
+        if best is None or (profile_id == requested_id, -account_id) > (best[1] == requested_id, -best[0]):
+            found[requested_id] = (account_id, profile_id, account_name)
+    return (True, found)
+
 def get_deleted_items():
     success_acc, accounts = _execute_query("SELECT account_id, profile_id, account_name, 'Account' as type FROM accounts WHERE is_deleted = 1", fetch='all')
     if not success_acc: return success_acc, accounts
@@ -143,44 +295,149 @@ def get_deleted_items():
 def get_dependent_pages_count(account_ids):
     if not account_ids:
         return (True, 0)
-    query = f"SELECT COUNT(*) FROM pages WHERE linked_account_id IN ({','.join(['?'] * len(account_ids))})"
-    success, result = _execute_query(query, tuple(account_ids), fetch='one')
+    ids_condition, params = _ids_condition('linked_account_id', account_ids)
+    success, result = _execute_query(f"SELECT COUNT(*) FROM pages WHERE {ids_condition}", tuple(params), fetch='one')
     if not success:
         return success, result
     return (True, result[0] if result else 0)
 
 def check_duplicate(profile_id=None, uid=None):
-    if profile_id:
-        success, result = _execute_query("SELECT account_id FROM accounts WHERE profile_id = ?", (profile_id,), fetch='one')
-        if not success: return success, result
-        if result: return (True, "Profile ID")
-    if uid and uid.strip() != '':
-        success, result = _execute_query("SELECT account_id FROM accounts WHERE uid = ?", (uid,), fetch='one')
-        if not success: return success, result
-        if result: return (True, "UID")
-    return (True, None)
+    """Returns (True, "Profile ID" or "UID") for the field an existing account already uses, or (True, None)."""
+    uid = uid.strip() if uid and uid.strip() != '' else None
+    query = "SELECT MAX(profile_id IS ?1) FROM accounts WHERE profile_id = ?1 OR uid = ?2"
+    success, result = _execute_query(query, (profile_id or None, uid), fetch='one')
+    if not success: return success, result
+    if result[0] is None: return (True, None)
+    return (True, "Profile ID" if result[0] else "UID")
+
+def check_import_duplicates(keys):
+    """
+    Checks an import batch against the existing accounts and against itself before
+    anything is written. keys is an iterable of (profile_id, uid) per row, or None for
+    a row that cannot be imported. Returns (True, {'rows', 'new', 'conflicts'}) where
+    conflicts is [(row number, profile_id, [reasons])] for the rows that would be skipped.
+    """
+    conn = get_connection()
+    if not conn: return (False, "Database connection failed.")
+    conflicts, rows = [], 0
+
+    def batch_keys():
+        nonlocal rows
+        for rows, key in enumerate(keys, 1):
+            if key is None:
+                conflicts.append((rows, '', ["Missing Profile ID or account name"]))
+            else:
+                profile_id, uid = key
+                yield (rows, profile_id, uid.strip() if uid and uid.strip() != '' else None)
+
+    in_transaction = conn.in_transaction
+    try:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_check (seq INTEGER PRIMARY KEY, profile_id TEXT, uid TEXT)")
+        conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_import_check_profile ON import_check (profile_id, seq)")
+        conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_import_check_uid ON import_check (uid, seq)")
+        conn.execute("DELETE FROM temp.import_check")
+        conn.executemany("INSERT INTO temp.import_check (seq, profile_id, uid) VALUES (?, ?, ?)", batch_keys())
+        # One pass over the batch: unique-index lookups into accounts, index seeks for the first row with each key
+        found = conn.execute("""
+            SELECT seq, profile_id, profile_deleted, uid_deleted, first_profile_seq, first_uid_seq FROM (
+                SELECT import_check.seq, import_check.profile_id, pa.is_deleted AS profile_deleted, ua.is_deleted AS uid_deleted,
+                       (SELECT MIN(d.seq) FROM import_check d WHERE d.profile_id = import_check.profile_id) AS first_profile_seq,
+                       (SELECT MIN(d.seq) FROM import_check d WHERE d.uid = import_check.uid) AS first_uid_seq
+                FROM import_check
+                LEFT JOIN accounts pa ON pa.profile_id = import_check.profile_id
+                LEFT JOIN accounts ua ON ua.uid = import_check.uid
+            )
+            WHERE profile_deleted IS NOT NULL OR uid_deleted IS NOT NULL OR first_profile_seq < seq OR first_uid_seq < seq
+        """).fetchall()
+        conn.execute("DELETE FROM temp.import_check")
+        if not in_transaction:
+            conn.commit() # Only temp pages were written
+    except Exception as e: # Includes errors raised while producing the keys
+        if not in_transaction:
+            conn.rollback()
+        return (False, str(e))
+
+    for seq, profile_id, profile_deleted, uid_deleted, first_profile_seq, first_uid_seq in found:
+        reasons = []
+        if profile_deleted is not None:
+            reasons.append("Profile ID is in the Recycle Bin" if profile_deleted else "Profile ID already exists")
+        if uid_deleted is not None:
+            reasons.append("UID is in the Recycle Bin" if uid_deleted else "UID already exists")
+        if first_profile_seq is not None and first_profile_seq < seq:
+            reasons.append(f"Same Profile ID as row {first_profile_seq}")
+        if first_uid_seq is not None and first_uid_seq < seq:
+            reasons.append(f"Same UID as row {first_uid_seq}")
+        conflicts.append((seq, profile_id, reasons))
+    conflicts.sort()
+    return (True, {'rows': rows, 'new': rows - len(conflicts), 'conflicts': conflicts})
 
 def get_multiple_accounts_details(account_ids):
     if not account_ids: return (True, [])
+    ids_condition, params = _ids_condition('account_id', account_ids)
     query = f"""
         SELECT * FROM accounts 
-        WHERE account_id IN ({','.join(['?'] * len(account_ids))})
+        WHERE {ids_condition}
     """
-    return _execute_query(query, tuple(account_ids), fetch='all')
+    return _execute_query(query, tuple(params), fetch='all')
 
 def get_accounts_for_proxy_edit(account_ids):
     if not account_ids: return (True, [])
+    ids_condition, params = _ids_condition('account_id', account_ids)
     query = f"""
         SELECT account_id, profile_id, proxy, proxy_location FROM accounts 
-        WHERE account_id IN ({','.join(['?'] * len(account_ids))})
+        WHERE {ids_condition}
     """
-    return _execute_query(query, tuple(account_ids), fetch='all')
+    return _execute_query(query, tuple(params), fetch='all')
 
 def get_multiple_pages_details(page_ids):
     if not page_ids: return (True, [])
+    ids_condition, params = _ids_condition('p.page_id', page_ids)
     query = f"""
         SELECT p.page_id, p.page_name, p.uid_page_id, p.category, p.monetization, p.linked_account_id, a.profile_id 
         FROM pages p JOIN accounts a ON p.linked_account_id = a.account_id 
-        WHERE p.page_id IN ({','.join(['?'] * len(page_ids))})
+        WHERE {ids_condition}
+    """
+    return _execute_query(query, tuple(params), fetch='all')
+
+def get_data_version():
+    """
+    Returns PRAGMA data_version for this thread's connection. It changes whenever
+    another connection (another thread or app instance) commits to the database.
     """
-    return _execute_query(query, tuple(page_ids), fetch='all')
\ No newline at end of file
+    success, row = _execute_query("PRAGMA data_version", fetch='one')
+    if not success: return success, row
+    return (True, row[0])
+
+def get_latest_change_seq():
+    success, row = _execute_query("SELECT COALESCE(MAX(seq), 0) FROM changelog", fetch='one')
+    if not success: return success, row
+    return (True, row[0])
+
+def get_changes_since(seq, skip_own=False):
+    """
+    Returns (True, (latest_seq, changes)) where changes lists (table_name, row_id, op)
+    once per changed row with its latest op. changes is None when entries after seq
+    have already been pruned, or the log restarted below seq (a restore swapped in
+    another database file), and the caller must reload everything.
+    skip_own leaves out the entries this process wrote.
+    """
+    success, row = _execute_query("SELECT MIN(seq), MAX(seq) FROM changelog", fetch='one')
+    if not success: return success, row
+    oldest, latest = row
+    latest = latest or 0
+    if latest < seq:
+        return (True, (latest, None))
+    if latest == seq:
+        return (True, (seq, []))
+    if oldest > seq + 1:
+        return (True, (latest, None))
+    # With MAX(), SQLite takes the bare op column from the row holding the maximum seq
+    query = "SELECT table_name, row_id, op, MAX(seq) FROM changelog WHERE seq > ? AND seq <= ?"
+    params = [seq, latest]
+    if skip_own:
+        query += " AND origin IS NOT ?"
+        params.append(INSTANCE_ID)
+    query += " GROUP BY table_name, row_id"
+    success, rows = _execute_query(query, tuple(params), fetch='all')
+    if not success: return success, rows
+    return (True, (latest, [row[:3] for row in rows]))
@@ -1,49 +1,70 @@
 # database/write.py
 
-import json
+import itertools
 from utils import log
-from .connection import _execute_query, create_connection
+from .connection import _execute_query, _ids_condition, transaction
 from .read import get_all_accounts
+from .writer import queued_write
 
-def wipe_and_restore_database(accounts_data, pages_data):
-    """Wipes all data and restores it from provided lists of dictionaries."""
-    conn = create_connection()
-    if not conn: return (False, "Database connection failed.")
+CHANGELOG_RETENTION_DAYS = 7
+RESTORE_CHUNK_SIZE = 5000 # Rows per executemany() while restoring
+
+# Columns where an empty value means "not set". CSV exports write NULL as '', so restores
+# turn it back into NULL: uid is UNIQUE and would collide on the second blank row, and a
+# page_folders content_type of NULL means the folder was not chosen for a content type.
+NULL_WHEN_BLANK_COLUMNS = {'uid', 'content_type'}
+
+def _restore_rows(cursor, table_name, rows, progress=None, columns=None):
+    """
+    Inserts dict rows in RESTORE_CHUNK_SIZE chunks, taking columns from the first row
+    (only those in columns, if given). Returns the row count.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    headers = [header for header in first.keys() if columns is None or header in columns]
+    placeholders = ["NULLIF(?, '')" if header in NULL_WHEN_BLANK_COLUMNS else '?' for header in headers]
+    query = f"INSERT INTO {table_name} ({', '.join(headers)}) VALUES ({', '.join(placeholders)})"
+    values = (tuple(row.get(header) for header in headers) for row in itertools.chain([first], rows))
+    restored = 0
+    while True:
+        chunk = list(itertools.islice(values, RESTORE_CHUNK_SIZE))
+        if not chunk:
+            return restored
+        cursor.executemany(query, chunk)
+        restored += len(chunk)
+        if progress:
+            progress(table_name, restored)
+
+@queued_write
+def wipe_and_restore_database(accounts_data, pages_data, progress=None):
+    """
+    Wipes all data and restores it from iterables of dictionaries (e.g. csv.DictReader),
+    read a chunk at a time. progress(table_name, rows_restored) is called after each chunk.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("BEGIN TRANSACTION;")
-        cursor.execute("DELETE FROM pages;")
-        cursor.execute("DELETE FROM accounts;")
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('accounts', 'pages');")
-
-        if accounts_data:
-            acc_headers = accounts_data[0].keys()
-            acc_query = f"INSERT INTO accounts ({', '.join(acc_headers)}) VALUES ({', '.join(['?'] * len(acc_headers))})"
-            acc_rows = [tuple(row.values()) for row in accounts_data]
-            cursor.executemany(acc_query, acc_rows)
-
-        if pages_data:
-            pg_headers = pages_data[0].keys()
-            pg_query = f"INSERT INTO pages ({', '.join(pg_headers)}) VALUES ({', '.join(['?'] * len(pg_headers))})"
-            pg_rows = [tuple(row.values()) for row in pages_data]
-            cursor.executemany(pg_query, pg_rows)
-
-        conn.commit()
+        with transaction() as cursor:
+            cursor.execute("DELETE FROM pages;")
+            cursor.execute("DELETE FROM accounts;")
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('accounts', 'pages');")
+            accounts_count = _restore_rows(cursor, 'accounts', accounts_data, progress)
+            pages_count = _restore_rows(cursor, 'pages', pages_data, progress)
+        log.info(f"Restored {accounts_count} accounts and {pages_count} pages.")
         return (True, "Restore successful.")
     except Exception as e:
         log.error(f"Database restore failed: {e}")
-        conn.rollback()
         return (False, str(e))
-    finally:
-        if conn: conn.close()
             
+@queued_write
 def add_account(data):
     name = data['account_name'].strip().title()
     category = data.get('category', '').strip().title()
-    query = "INSERT INTO accounts (profile_id, account_name, uid, account_category, status) VALUES (?, ?, ?, ?, 'Created')"
+    query = "INSERT INTO accounts (profile_id, account_name, uid, account_category, status) VALUES (?, ?, NULLIF(?, ''), ?, 'Created')"
     params = (data['profile_id'], name, data['uid'], category)
     return _execute_query(query, params, commit=True)
 
+@queued_write
 def add_page(details):
     name = details['page_name'].strip().title()
     category = details.get('category', '').strip().title()
@@ -51,41 +72,77 @@ def add_page(details):
     params = (name, details['uid_page_id'], category, details.get('monetization', ''), details['linked_account_id'])
     return _execute_query(query, params, commit=True)
 
+@queued_write
 def bulk_add_pages(pages_data):
-    success, all_accounts = get_all_accounts()
-    if not success: return success, all_accounts
-    
-    profile_id_map = {acc[1].upper(): acc[0] for acc in all_accounts}
-    pages_to_add = []
-    for page in pages_data:
-        profile_id = page['profile_id'].upper()
-        if profile_id in profile_id_map:
-            account_id = profile_id_map[profile_id]
-            name = page['page_name'].strip().title()
-            category = page.get('category', '').strip().title()
-            pages_to_add.append((name, page.get('uid_page_id', ''), category, account_id, 'Created'))
-
-    if not pages_to_add: return (False, "No valid accounts found for the given Profile IDs.")
-    query = "INSERT INTO pages (page_name, uid_page_id, category, linked_account_id, status) VALUES (?, ?, ?, ?, ?)"
-    return _execute_query(query, pages_to_add, commit=True, executemany=True)
+    """
+    Adds pages to the live accounts named by their profile_id, matched case-insensitively
+    (an exact-case match wins). Accounts are resolved in SQL, so none are loaded here.
+    Returns (True, {'added': count, 'unmatched': [input rows with no such account]}).
+    """
+    rows = [(seq, page['profile_id'].strip(), page['page_name'].strip().title(), page.get('uid_page_id', ''),
+             page.get('category', '').strip().title()) for seq, page in enumerate(pages_data)]
+    try:
+        with transaction() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS temp.new_pages")
+            cursor.execute("""
+                CREATE TEMP TABLE new_pages (seq INTEGER PRIMARY KEY, profile_id TEXT, page_name TEXT,
+                                             uid_page_id TEXT, category TEXT, account_id INTEGER)
+            """)
+            cursor.executemany("INSERT INTO new_pages (seq, profile_id, page_name, uid_page_id, category) VALUES (?, ?, ?, ?, ?)", rows)
+            # Exact-case matches first, then the rest through the NOCASE index
+            cursor.execute("""
+                UPDATE new_pages SET account_id = (
+                    SELECT a.account_id FROM accounts a WHERE a.profile_id = new_pages.profile_id AND a.is_deleted = 0)
+            """)
+            cursor.execute("""
+                UPDATE new_pages SET account_id = (
+                    SELECT MIN(a.account_id) FROM accounts a
+                    WHERE a.profile_id = new_pages.profile_id COLLATE NOCASE AND a.is_deleted = 0)
+                WHERE account_id IS NULL
+            """)
+            cursor.execute("""
+                INSERT INTO pages (page_name, uid_page_id, category, linked_account_id, status)
+                SELECT page_name, uid_page_id, category, account_id, 'Created' FROM new_pages
+                WHERE account_id IS NOT NULL ORDER BY seq
+            """)
+            added = cursor.rowcount
+            unmatched = [row[0] for row in cursor.execute("SELECT seq FROM new_pages WHERE account_id IS NULL ORDER BY seq")]
+            cursor.execute("DROP TABLE temp.new_pages")
+    except Exception as e:
+        log.error(f"Bulk add pages failed: {e}")
+        return (False, str(e))
+    return (True, {'added': added, 'unmatched': [pages_data[seq] for seq in unmatched]})
 
-def bulk_import_accounts(records):
-    keys = ['profile_id', 'account_name', 'uid', 'account_category', 'proxy', 'proxy_location', 'monetization', 'note']
-    processed = []
-    for rec in records:
-        if not rec.get('profile_id') or not rec.get('account_name'): continue
-        clean = {key: rec.get(key, '').strip() for key in keys}
-        clean['account_name'] = clean['account_name'].title()
-        clean['account_category'] = clean['account_category'].title()
-        processed.append(clean)
+ACCOUNT_IMPORT_KEYS = ['profile_id', 'account_name', 'uid', 'account_category', 'proxy', 'proxy_location', 'monetization', 'note']
+_IMPORT_ACCOUNTS_QUERY = """
+    INSERT OR IGNORE INTO accounts (profile_id, account_name, uid, account_category, proxy, proxy_location, monetization, status, note) 
+    VALUES (?, ?, NULLIF(?, ''), ?, ?, ?, ?, 'Imported', ?)
+"""
 
+def normalize_account_record(rec):
+    """Returns the record cleaned for import as a tuple in ACCOUNT_IMPORT_KEYS order, or None if it lacks a profile_id or name."""
+    if not rec.get('profile_id') or not rec.get('account_name'): return None
+    clean = {key: (rec.get(key) or '').strip() for key in ACCOUNT_IMPORT_KEYS}
+    clean['account_name'] = clean['account_name'].title()
+    clean['account_category'] = clean['account_category'].title()
+    return tuple(clean[key] for key in ACCOUNT_IMPORT_KEYS)
+
+def account_import_key(row):
+    """Returns (profile_id, uid) of a normalize_account_record row, or None for a rejected row, for check_import_duplicates."""
+    return (row[0], row[2]) if row else None
+
+@queued_write
+def bulk_import_accounts(records):
+    processed = [row for row in map(normalize_account_record, records) if row]
     if not processed: return (False, "No valid records to import.")
-    query = """
-        INSERT OR IGNORE INTO accounts (profile_id, account_name, uid, account_category, proxy, proxy_location, monetization, status, note) 
-        VALUES (:profile_id, :account_name, :uid, :account_category, :proxy, :proxy_location, :monetization, 'Imported', :note)
-    """
-    return _execute_query(query, processed, commit=True, executemany=True)
+    return import_normalized_accounts(processed)
+
+@queued_write
+def import_normalized_accounts(rows):
+    """Inserts rows from normalize_account_record, skipping existing profile_ids and uids. Returns (success, rows inserted)."""
+    return _execute_query(_IMPORT_ACCOUNTS_QUERY, rows, commit=True, executemany=True)
 
+@queued_write
 def update_account_details(account_id, details):
     details['account_name'] = details['account_name'].strip().title()
     details['account_category'] = details['account_category'].strip().title()
@@ -93,108 +150,181 @@ def update_account_details(account_id, details):
     params = (details['account_name'], details['account_category'], details.get('monetization', ''), details.get('proxy', ''), details.get('proxy_location', ''), details.get('note', ''), account_id)
     return _execute_query(query, params, commit=True)
 
+def _bulk_update_partial(table, key, updates, title_fields):
+    """
+    Applies partial row updates grouped by their set of changed columns, one
+    executemany per group, in a single transaction. The caller's dicts are not modified.
+    Returns (True, [(row_id, outcome), ...]) in input order, where outcome is
+    'updated', 'not found' or 'no changes'.
+    """
+    groups = {}
+    outcomes = []
+    for item in updates:
+        row_id = item.get(key)
+        changes = {col: value for col, value in item.items() if col != key}
+        if not changes:
+            outcomes.append((row_id, 'no changes'))
+            continue
+        for col in title_fields:
+            if col in changes: changes[col] = (changes[col] or '').strip().title()
+        columns = tuple(sorted(changes))
+        groups.setdefault(columns, []).append(tuple(changes[col] for col in columns) + (row_id,))
+        outcomes.append((row_id, None))
+
+    try:
+        with transaction() as cursor:
+            for columns, rows in groups.items():
+                fields = ', '.join(f"{col} = ?" for col in columns)
+                cursor.executemany(f"UPDATE {table} SET {fields}, status = 'Bulk Updated' WHERE {key} = ?", rows)
+
+            found = set()
+            ids = [row_id for row_id, outcome in outcomes if outcome is None]
+            if ids:
+                ids_condition, params = _ids_condition(key, ids)
+                found.update(row[0] for row in cursor.execute(f"SELECT {key} FROM {table} WHERE {ids_condition}", params))
+        return (True, [(row_id, outcome or ('updated' if row_id in found else 'not found')) for row_id, outcome in outcomes])
+    except Exception as e:
+        log.error(f"Bulk update of {table} failed: {e}")
+        return (False, str(e))
+
+@queued_write
 def bulk_update_accounts_partial(updates):
-    # This function requires a direct connection for transaction management
-    conn = create_connection()
-    if not conn: return (False, "Database connection failed.")
+    return _bulk_update_partial('accounts', 'account_id', updates, ['account_category'])
+
+def _record_used_folders(cursor, page_id, folders):
+    """Adds (folder, content_type) pairs to the page's history and refreshes its used_folders mirror."""
+    cursor.executemany("INSERT OR IGNORE INTO page_folders (page_id, folder, content_type) VALUES (?, ?, ?)",
+                       [(page_id, folder, content_type) for folder, content_type in folders if folder])
+    cursor.execute("""
+        UPDATE pages SET used_folders = (
+            SELECT json_group_array(folder) FROM (SELECT folder FROM page_folders WHERE page_id = ?1 ORDER BY first_used, rowid)
+        ) WHERE page_id = ?1
+    """, (page_id,))
+
+@queued_write
+def record_used_folders(page_id, folders, content_type=None):
+    """Adds folders to a page's used-folder history."""
     try:
-        cursor = conn.cursor()
-        for item_update in updates:
-            if len(item_update) <= 1: continue
-            account_id = item_update.pop('account_id')
-            if 'account_category' in item_update:
-                item_update['account_category'] = item_update.get('account_category', '').strip().title()
-
-            fields = [f"{key} = ?" for key in item_update.keys()]
-            params = list(item_update.values()) + [account_id]
-            query = f"UPDATE accounts SET {', '.join(fields)}, status = 'Bulk Updated' WHERE account_id = ?"
-            cursor.execute(query, tuple(params))
-        conn.commit()
-        return (True, f"{len(updates)} accounts processed.")
+        with transaction() as cursor:
+            _record_used_folders(cursor, page_id, [(folder, content_type) for folder in folders])
+        return (True, "Folders recorded.")
     except Exception as e:
-        conn.rollback()
+        log.error(f"Failed to record used folders for page {page_id}: {e}")
         return (False, str(e))
-    finally:
-        if conn: conn.close()
 
+@queued_write
 def update_page_details(page_id, details):
     details['status'] = 'Details Updated'
     if 'page_name' in details: details['page_name'] = details['page_name'].strip().title()
     if 'category' in details: details['category'] = details['category'].strip().title()
-    if 'used_folders' in details and isinstance(details['used_folders'], list):
-        details['used_folders'] = json.dumps(details['used_folders'])
-    
+    used_folders = details.pop('used_folders') if isinstance(details.get('used_folders'), list) else None
+
     set_clause = ", ".join([f"{key} = ?" for key in details.keys()])
     params = list(details.values()) + [page_id]
     query = f"UPDATE pages SET {set_clause} WHERE page_id = ?"
-    return _execute_query(query, tuple(params), commit=True)
+    if used_folders is None:
+        return _execute_query(query, tuple(params), commit=True)
+    try:
+        with transaction() as cursor:
+            cursor.execute(query, tuple(params))
+            # A folder the page now uses for a content type is tagged with that type
+            content_types = {details.get(f'{kind}_folder'): kind for kind in ('video', 'reels', 'photo')}
+            _record_used_folders(cursor, page_id, [(folder, content_types.get(folder)) for folder in used_folders])
+        return (True, "Page updated.")
+    except Exception as e:
+        log.error(f"Failed to update page {page_id}: {e}")
+        return (False, str(e))
 
+@queued_write
 def update_page_note(page_id, note):
     query = "UPDATE pages SET note = ?, status = 'Note Saved' WHERE page_id = ?"
     return _execute_query(query, (note, page_id), commit=True)
 
+@queued_write
 def update_account_note(account_id, note):
     query = "UPDATE accounts SET note = ?, status = 'Note Saved' WHERE account_id = ?"
     return _execute_query(query, (note, account_id), commit=True)
 
+@queued_write
 def soft_delete(item_type, item_id):
     table = 'accounts' if item_type == 'account' else 'pages'
     column = 'account_id' if item_type == 'account' else 'page_id'
     query = f"UPDATE {table} SET is_deleted = 1, status = 'Deleted' WHERE {column} = ?"
     return _execute_query(query, (item_id,), commit=True)
 
+@queued_write
 def restore_item(item_type, item_id):
     table = 'accounts' if item_type == 'Account' else 'pages'
     column = 'account_id' if item_type == 'Account' else 'page_id'
     query = f"UPDATE {table} SET is_deleted = 0, status = 'Restored' WHERE {column} = ?"
     return _execute_query(query, (item_id,), commit=True)
 
+def _set_items_deleted(items, is_deleted, status):
+    """Flags (item_type, item_id) pairs in one transaction with one UPDATE per type."""
+    ids_by_table = {'accounts': [], 'pages': []}
+    for item_type, item_id in items:
+        ids_by_table['accounts' if item_type.lower() == 'account' else 'pages'].append(item_id)
+    try:
+        updated = 0
+        with transaction() as cursor:
+            for table, ids in ids_by_table.items():
+                if not ids: continue
+                ids_condition, params = _ids_condition('account_id' if table == 'accounts' else 'page_id', ids)
+                cursor.execute(f"UPDATE {table} SET is_deleted = ?, status = ? WHERE {ids_condition}", (is_deleted, status, *params))
+                updated += cursor.rowcount
+        return (True, updated)
+    except Exception as e:
+        log.error(f"Failed to update deleted flag: {e}")
+        return (False, str(e))
+
+@queued_write
+def soft_delete_items(items):
+    """Moves a list of (item_type, item_id) pairs to the recycle bin in one transaction."""
+    return _set_items_deleted(items, 1, 'Deleted')
+
+@queued_write
+def restore_items(items):
+    """Restores a list of (item_type, item_id) pairs from the recycle bin in one transaction."""
+    return _set_items_deleted(items, 0, 'Restored')
+
+@queued_write
 def permanently_delete_items(items_to_delete):
-    conn = create_connection()
-    if not conn: return (False, "Database connection failed.")
     try:
-        cursor = conn.cursor()
-        for item_type, item_id in items_to_delete:
-            table = 'accounts' if item_type == 'Account' else 'pages'
-            column = 'account_id' if item_type == 'Account' else 'page_id'
-            cursor.execute(f"DELETE FROM {table} WHERE {column} = ?", (item_id,))
-        conn.commit()
+        with transaction() as cursor:
+            for item_type, item_id in items_to_delete:
+                table = 'accounts' if item_type == 'Account' else 'pages'
+                column = 'account_id' if item_type == 'Account' else 'page_id'
+                cursor.execute(f"DELETE FROM {table} WHERE {column} = ?", (item_id,))
         return (True, "Items deleted.")
     except Exception as e:
-        conn.rollback()
         return (False, str(e))
-    finally:
-        if conn: conn.close()
 
+@queued_write
 def quick_edit_items(item_type, item_ids, field, value):
+    """Sets field to value on every given item. Returns (True, number of rows updated)."""
     table = 'accounts' if item_type == 'account' else 'pages'
     col_id = 'account_id' if item_type == 'account' else 'page_id'
     if field in ['account_category', 'category', 'page_name', 'account_name']:
         value = value.strip().title()
-    placeholders = ','.join(['?'] * len(item_ids))
-    query = f"UPDATE {table} SET {field} = ?, status = 'Quick Updated' WHERE {col_id} IN ({placeholders})"
-    params = [value] + item_ids
-    return _execute_query(query, tuple(params), commit=True)
-
-def bulk_update_pages_partial(updates):
-    conn = create_connection()
-    if not conn: return (False, "Database connection failed.")
     try:
-        cursor = conn.cursor()
-        for item in updates:
-            if len(item) <= 1: continue
-            page_id = item.pop('page_id')
-            if 'page_name' in item: item['page_name'] = item['page_name'].strip().title()
-            if 'category' in item: item['category'] = item['category'].strip().title()
-            
-            fields = [f"{key} = ?" for key in item.keys()]
-            params = list(item.values()) + [page_id]
-            query = f"UPDATE pages SET {', '.join(fields)}, status = 'Bulk Updated' WHERE page_id = ?"
-            cursor.execute(query, tuple(params))
-        conn.commit()
-        return (True, f"{len(updates)} pages processed.")
+        with transaction() as cursor:
+            ids_condition, ids_params = _ids_condition(col_id, item_ids)
+            cursor.execute(f"UPDATE {table} SET {field} = ?, status = 'Quick Updated' WHERE {ids_condition}", (value, *ids_params))
+            updated = cursor.rowcount
+        return (True, updated)
     except Exception as e:
-        conn.rollback()
+        log.error(f"Quick edit of {field} failed: {e}")
         return (False, str(e))
-    finally:
-        if conn: conn.close()
\ No newline at end of file
+
+@queued_write
+def bulk_update_pages_partial(updates):
+    return _bulk_update_partial('pages', 'page_id', updates, ['page_name', 'category'])
+
+@queued_write
+def prune_changelog(max_age_days=CHANGELOG_RETENTION_DAYS):
+    """
+    Deletes change log entries older than max_age_days. The newest entry is always
+    kept, so readers can tell a quiet log from one that restarted after a restore.
+    """
+    query = "DELETE FROM changelog WHERE changed_at < datetime('now', ?) AND seq < (SELECT MAX(seq) FROM changelog)"
+    return _execute_query(query, (f"-{int(max_age_days)} days",), commit=True)
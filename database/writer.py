@@ -0,0 +1,155 @@
+# database/writer.py
+
+"""
+Single writer thread for all database writes.
+
+Public functions in write.py are wrapped with @queued_write. While the writer runs,
+calls from any thread are queued, and jobs that arrive together run in one
+transaction (one fsync) with a savepoint per job. Each job still succeeds or fails
+on its own. Without a running writer, writes run inline on the calling thread.
+"""
+
+import functools
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from utils import log
+from . import connection
+
+MAX_BATCH_JOBS = 200 # Upper bound on jobs grouped into one commit
+
+_STOP = object()
+_queue = queue.Queue()
+_lock = threading.Lock()
+_thread = None
+
+class _WriteJob:
+    def __init__(self, func, args, kwargs):
+        self.func, self.args, self.kwargs = func, args, kwargs
+        self.future = Future()
+
+def _fail(jobs, error):
+    for job in jobs:
+        job.future.set_exception(error)
+
+def _run_job(job):
+    try:
+        job.future.set_result(job.func(*job.args, **job.kwargs))
+    except Exception as e:
+        job.future.set_exception(e)
+
+def _run_batch(jobs):
+    """Runs jobs in one transaction and resolves their futures once it commits."""
+    if len(jobs) == 1:
+        # A lone job commits itself. Savepoints make large FTS5 inserts much slower,
+        # so they are only used when there are other jobs to protect.
+        _run_job(jobs[0])
+        return
+    conn = connection.get_connection()
+    if not conn:
+        _fail(jobs, sqlite3.OperationalError("Database connection failed."))
+        return
+
+    done = [] # (job, succeeded, result or exception), resolved after the commit
+    connection._local.write_batch = True
+    connection._local.write_batch_broken = False
+    try:
+        if conn.in_transaction:
+            conn.commit()
+        for job in jobs:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute(f"SAVEPOINT {connection.WRITE_JOB_SAVEPOINT}")
+            try:
+                done.append((job, True, job.func(*job.args, **job.kwargs)))
+            except Exception as e:
+                done.append((job, False, e))
+                connection._rollback(conn)
+
+            if connection._local.write_batch_broken or not conn.in_transaction:
+                # The transaction is gone, and with it every job so far in this batch
+                error = sqlite3.OperationalError("Write batch was rolled back by a failed job.")
+                for earlier, succeeded, result in done:
+                    earlier.future.set_exception(error if succeeded else result)
+                done = []
+                connection._local.write_batch_broken = False
+                continue
+            conn.execute(f"RELEASE {connection.WRITE_JOB_SAVEPOINT}")
+        if conn.in_transaction:
+            conn.commit()
+    except sqlite3.Error as e:
+        log.error(f"Write batch of {len(jobs)} job(s) failed: {e}")
+        conn.rollback()
+        _fail([job for job in jobs if not job.future.done()], e)
+        return
+    finally:
+        connection._local.write_batch = False
+
+    for job, succeeded, result in done:
+        if succeeded:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(result)
+
+def _writer_loop():
+    while True:
+        job = _queue.get()
+        if job is _STOP:
+            break
+        jobs, stopping = [job], False
+        while len(jobs) < MAX_BATCH_JOBS:
+            try:
+                job = _queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stopping = True
+                break
+            jobs.append(job)
+        _run_batch(jobs)
+        if stopping:
+            break
+    log.info("Database writer stopped.")
+
+def start_writer():
+    """Starts the writer thread if it is not already running."""
+    global _thread
+    with _lock:
+        if _thread and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_writer_loop, name='db-writer', daemon=True)
+        _thread.start()
+    log.info("Database writer started.")
+
+def is_writer_running():
+    return _thread is not None
+
+def stop_writer(timeout=None):
+    """Finishes every queued write, then stops the writer thread."""
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+        if not thread:
+            return
+        _queue.put(_STOP)
+    thread.join(timeout)
+
+def submit_write(func, *args, **kwargs):
+    """Queues func(*args, **kwargs) for the writer and returns a Future with its result."""
+    with _lock:
+        if _thread and threading.current_thread() is not _thread:
+            job = _WriteJob(func, args, kwargs)
+            _queue.put(job)
+            return job.future
+    # No writer running, or a job calling another write function: run inline
+    job = _WriteJob(func, args, kwargs)
+    _run_job(job)
+    return job.future
+
+def queued_write(func):
+    """Decorator that routes a write function through the writer and waits for its result."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return submit_write(func, *args, **kwargs).result()
+    return wrapper
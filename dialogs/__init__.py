@@ -4,5 +4,5 @@ from .account import AddAccountDialog, EditAccountDialog, ImportAccountsDialog
 from .page import AddPageDialog, EditPageDialog, AdvancedBulkAddPagesDialog, ScheduleDetailDialog, EditScheduleDialog
 from .bulk_edit import BulkEditAccountsDialog, BulkEditPagesDialog, BulkProxyDialog
 from .recycle_bin import RecycleBinDialog, ConfirmDeleteDialog
-from .settings import ColumnSettingsDialog
+from .settings import ColumnSettingsDialog, QueryStatsDialog
 from .utility import (NoteDialog, CompleterDelegate)
\ No newline at end of file
@@ -1,8 +1,10 @@
 
 # dialogs/account.py
 
+import os
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLineEdit, QDialogButtonBox, 
-                             QFormLayout, QLabel, QComboBox, QTextEdit, QHBoxLayout)
+                             QFormLayout, QLabel, QComboBox, QTextEdit, QHBoxLayout,
+                             QPushButton, QFileDialog)
 
 class AddAccountDialog(QDialog):
     def __init__(self, parent=None):
@@ -54,12 +56,20 @@ class ImportAccountsDialog(QDialog):
         format_layout.addWidget(QLabel("Separator:")); format_layout.addWidget(self.separator_input)
         for combo in self.combos: combo.addItems(self.column_options); format_layout.addWidget(combo)
         self.combos[0].setCurrentText("Profile ID"); self.combos[1].setCurrentText("UID"); self.combos[2].setCurrentText("Account Name")
+        # Large dumps are imported straight from a file instead of being pasted
+        self.file_path = None; file_layout = QHBoxLayout(); self.load_file_btn = QPushButton("Load File..."); self.file_label = QLabel("")
+        self.load_file_btn.clicked.connect(self.choose_file); file_layout.addWidget(self.load_file_btn); file_layout.addWidget(self.file_label, 1)
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         self.button_box.accepted.connect(self.accept); self.button_box.rejected.connect(self.reject)
-        main_layout.addWidget(QLabel("Define the format of your pasted data:")); main_layout.addWidget(self.data_input); main_layout.addLayout(format_layout); main_layout.addWidget(self.button_box); self.setLayout(main_layout)
+        main_layout.addWidget(QLabel("Define the format of your pasted data:")); main_layout.addWidget(self.data_input); main_layout.addLayout(file_layout); main_layout.addLayout(format_layout); main_layout.addWidget(self.button_box); self.setLayout(main_layout)
+    def choose_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select Accounts File", "", "Text Files (*.txt *.csv *.gz);;All Files (*)")
+        if not path: return
+        self.file_path = path; self.file_label.setText(f"Importing from file: {os.path.basename(path)}")
+        self.data_input.setEnabled(False); self.data_input.setPlaceholderText("The selected file will be imported instead of pasted data.")
     def get_data(self):
         db_mapping = {"Profile ID": "profile_id", "Account Name": "account_name", "UID": "uid", "Category": "account_category", "Proxy": "proxy", "Proxy Location": "proxy_location", "Monetization": "monetization"}; mapping = {}
         for i, combo in enumerate(self.combos):
             text = combo.currentText()
             if text != "(Not Used)": mapping[i] = db_mapping[text]
-        return {"text_data": self.data_input.toPlainText(), "separator": self.separator_input.text(), "mapping": mapping}
\ No newline at end of file
+        return {"text_data": self.data_input.toPlainText(), "separator": self.separator_input.text(), "mapping": mapping, "file_path": self.file_path}
\ No newline at end of file
@@ -11,11 +11,11 @@ from .utility import CompleterDelegate
 class AdvancedBulkAddPagesDialog(QDialog):
     """Dialog for advanced bulk addition of pages with validation"""
     
-    def __init__(self, profile_id_map, page_categories, parent=None):
+    def __init__(self, find_profile, page_categories, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Advanced Bulk Add Pages")
         self.setMinimumSize(800, 500)
-        self.profile_id_map = profile_id_map
+        self.find_profile = find_profile # profile_id -> (profile_id, account_name) or None, ignoring case
         self.init_ui(page_categories)
     
     def init_ui(self, page_categories):
@@ -78,10 +78,11 @@ class AdvancedBulkAddPagesDialog(QDialog):
                 return
                 
             self.table.blockSignals(True)
-            profile_id = item.text().strip().split(' ')[0].upper()
+            profile_id = item.text().strip().split(' ')[0]
+            match = self.find_profile(profile_id) if profile_id else None
             
-            if profile_id in self.profile_id_map:
-                original_case_id, account_name = self.profile_id_map[profile_id]
+            if match:
+                original_case_id, account_name = match
                 item.setText(f"{original_case_id} ({account_name})")
                 item.setBackground(QColor("white"))
             else:
@@ -1,7 +1,6 @@
 # dialogs/page.py
 
 import os
-import json
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLineEdit, QDialogButtonBox, 
                              QFormLayout, QLabel, QComboBox, QTextEdit,
                              QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView,
@@ -138,13 +137,10 @@ class ScheduleDetailDialog(QDialog):
     
     def update_used_folders_display(self):
         """Update the display of previously used folders"""
-        try:
-            used_folders = json.loads(self.page_data.get('used_folders', '[]'))
-            if used_folders:
-                self.used_folders_display.setText('\n'.join(used_folders))
-            else:
-                self.used_folders_display.setText("No previously used folders")
-        except (json.JSONDecodeError, TypeError):
+        used_folders = self.page_data.get('used_folders') or []
+        if used_folders:
+            self.used_folders_display.setText('\n'.join(used_folders))
+        else:
             self.used_folders_display.setText("No previously used folders")
     
     def open_edit_dialog(self):
@@ -351,11 +347,11 @@ class AddPageDialog(QDialog):
 
 
 class AdvancedBulkAddPagesDialog(QDialog):
-    def __init__(self, profile_id_map, page_categories, parent=None):
+    def __init__(self, find_profile, page_categories, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Advanced Bulk Add Pages")
         self.setMinimumSize(800, 500)
-        self.profile_id_map = profile_id_map
+        self.find_profile = find_profile # profile_id -> (profile_id, account_name) or None, ignoring case
 
         main_layout = QVBoxLayout(self)
         self.table = QTableWidget()
@@ -407,10 +403,11 @@ class AdvancedBulkAddPagesDialog(QDialog):
                 return
                 
             self.table.blockSignals(True)
-            profile_id = item.text().strip().split(' ')[0].upper()
+            profile_id = item.text().strip().split(' ')[0]
+            match = self.find_profile(profile_id) if profile_id else None
             
-            if profile_id in self.profile_id_map:
-                original_case_id, account_name = self.profile_id_map[profile_id]
+            if match:
+                original_case_id, account_name = match
                 item.setText(f"{original_case_id} ({account_name})")
                 item.setBackground(QColor("white"))
             else:
@@ -561,21 +558,13 @@ class EditPageDialog(QDialog):
             count_label.setText(f"({count} files)")
             self.unsetCursor()
             
-            try:
-                current_folders = json.loads(self.page_data.get('used_folders') or '[]')
-                if folder not in current_folders:
-                    current_folders.append(folder)
-                    self.page_data['used_folders'] = json.dumps(current_folders)
-                    self.update_used_folders_display()
-            except json.JSONDecodeError:
-                pass
+            current_folders = self.page_data.get('used_folders') or []
+            if folder not in current_folders:
+                self.page_data['used_folders'] = current_folders + [folder]
+                self.update_used_folders_display()
 
     def update_used_folders_display(self):
-        try:
-            used_folders_list = json.loads(self.page_data.get('used_folders') or '[]')
-            self.used_folders_display.setText('\n'.join(used_folders_list))
-        except json.JSONDecodeError:
-            self.used_folders_display.setText("")
+        self.used_folders_display.setText('\n'.join(self.page_data.get('used_folders') or []))
 
     def count_files(self, path):
         if path and os.path.isdir(path):
@@ -634,7 +623,7 @@ class EditPageDialog(QDialog):
             "video_folder": self.video_folder_label.text() if self.video_folder_label.text() != 'Not Set' else '',
             "reels_folder": self.reels_folder_label.text() if self.reels_folder_label.text() != 'Not Set' else '',
             "photo_folder": self.photo_folder_label.text() if self.photo_folder_label.text() != 'Not Set' else '',
-            "used_folders": self.page_data.get('used_folders', '[]')
+            "used_folders": list(self.page_data.get('used_folders') or [])
         }
         
         # CRITICAL FIX: Only include schedule data if it was actually changed
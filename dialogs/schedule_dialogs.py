@@ -1,7 +1,6 @@
 # dialogs/schedule_dialogs.py
 
 import os
-import json
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QDialogButtonBox, 
                              QFormLayout, QLabel, QHBoxLayout,
                              QPushButton, QFileDialog, QMessageBox, QDateEdit, 
@@ -138,13 +137,10 @@ class ScheduleDetailDialog(QDialog):
     
     def update_used_folders_display(self):
         """Update the display of previously used folders"""
-        try:
-            used_folders = json.loads(self.page_data.get('used_folders', '[]'))
-            if used_folders:
-                self.used_folders_display.setText('\n'.join(used_folders))
-            else:
-                self.used_folders_display.setText("No previously used folders")
-        except (json.JSONDecodeError, TypeError):
+        used_folders = self.page_data.get('used_folders') or []
+        if used_folders:
+            self.used_folders_display.setText('\n'.join(used_folders))
+        else:
             self.used_folders_display.setText("No previously used folders")
     
     def open_edit_dialog(self):
@@ -2,7 +2,9 @@
 
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QDialogButtonBox, 
                              QLabel, QPushButton, QHBoxLayout, QWidget, 
-                             QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox)
+                             QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox,
+                             QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt5.QtCore import Qt
 from utils.settings_handler import get_default_settings
 
 class ColumnSettingsDialog(QDialog):
@@ -89,4 +91,82 @@ class ColumnSettingsDialog(QDialog):
         self.original_settings['columns'][self.view_type]['order'] = new_order
         self.original_settings['columns'][self.view_type]['visible'] = new_visible
         self.original_settings['columns'][self.view_type]['widths'] = widths
-        return self.original_settings
\ No newline at end of file
+        return self.original_settings
+
+class QueryStatsDialog(QDialog):
+    """
+    Shows the query statistics collected by the database layer and edits the
+    collection settings. get_stats and reset_stats are the database functions.
+    """
+    COLUMNS = [('fingerprint', 'Query'), ('executions', 'Runs'), ('total_ms', 'Total ms'),
+               ('avg_ms', 'Avg ms'), ('max_ms', 'Max ms'), ('rows', 'Rows')]
+
+    def __init__(self, database_settings, get_stats, reset_stats, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Query Statistics")
+        self.setMinimumSize(900, 500)
+        self.database_settings = database_settings
+        self.get_stats = get_stats
+        self.reset_stats = reset_stats
+
+        main_layout = QVBoxLayout(self)
+        options_layout = QHBoxLayout()
+        self.enabled_checkbox = QCheckBox("Collect query statistics")
+        self.enabled_checkbox.setChecked(database_settings.get('query_stats', False))
+        self.threshold_input = QSpinBox()
+        self.threshold_input.setRange(0, 600000)
+        self.threshold_input.setSuffix(" ms")
+        self.threshold_input.setValue(int(database_settings.get('slow_query_ms', 200)))
+        options_layout.addWidget(self.enabled_checkbox)
+        options_layout.addStretch()
+        options_layout.addWidget(QLabel("Log queries slower than:"))
+        options_layout.addWidget(self.threshold_input)
+        main_layout.addLayout(options_layout)
+
+        main_layout.addWidget(QLabel("Reset, perform an action, then Refresh to see the queries it ran. "
+                                     "Only queries with a time were measured; the others were only counted."))
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([label for _, label in self.COLUMNS])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        main_layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.populate_table)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        self.button_box = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Close)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        button_layout.addWidget(refresh_btn)
+        button_layout.addWidget(reset_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(self.button_box)
+        main_layout.addLayout(button_layout)
+
+        self.populate_table()
+
+    def populate_table(self):
+        stats = self.get_stats()
+        self.table.setRowCount(len(stats))
+        for row, entry in enumerate(stats):
+            for col, (key, _) in enumerate(self.COLUMNS):
+                value = entry[key]
+                if key == 'fingerprint':
+                    item = QTableWidgetItem(value)
+                    item.setToolTip(value)
+                else:
+                    measured = entry['timed'] or key == 'executions'
+                    item = QTableWidgetItem((f"{value:,.1f}" if isinstance(value, float) else f"{value:,}") if measured else '')
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+
+    def reset(self):
+        self.reset_stats()
+        self.populate_table()
+
+    def get_updated_settings(self):
+        self.database_settings['query_stats'] = self.enabled_checkbox.isChecked()
+        self.database_settings['slow_query_ms'] = self.threshold_input.value()
+        return self.database_settings
@@ -2,7 +2,9 @@
 
 import os
 import csv
-from PyQt5.QtWidgets import QMessageBox, QFileDialog, QDialog
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from PyQt5.QtWidgets import QApplication, QMessageBox, QFileDialog, QDialog, QProgressDialog
 from PyQt5.QtCore import QDate, Qt
 from utils import log, settings_handler
 import database as db
@@ -10,7 +12,11 @@ from dialogs import (AddAccountDialog, AddPageDialog, EditPageDialog,
                      ImportAccountsDialog, RecycleBinDialog, EditAccountDialog,
                      AdvancedBulkAddPagesDialog, BulkEditAccountsDialog,
                      BulkEditPagesDialog, BulkProxyDialog, NoteDialog, ConfirmDeleteDialog,
-                     ColumnSettingsDialog, ScheduleDetailDialog)
+                     ColumnSettingsDialog, QueryStatsDialog, ScheduleDetailDialog)
+
+SQLITE_BACKUP_FILTER = "SQLite Backup (*.db)"
+GZIP_CSV_FILTER = "Compressed CSV (*.csv.gz)"
+PREVIEW_CONFLICT_LINES = 500 # Skipped rows listed in the import preview details
 
 
 class DialogHandler:
@@ -19,64 +25,93 @@ class DialogHandler:
         self.main_window = main_window
         self.main_widget = main_window.main_widget
 
+    def _page_progress_dialog(self, label):
+        """Returns a modal progress dialog and a progress(copied_pages, total_pages) callback for it."""
+        dialog = QProgressDialog(label, None, 0, 100, self.main_window)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+
+        def progress(copied, total):
+            dialog.setMaximum(max(total, 1))
+            dialog.setValue(copied)
+        return dialog, progress
+
     def open_export_dialog(self):
-        path, _ = QFileDialog.getSaveFileName(self.main_window, "Save Backup As", "", "CSV Files (*.csv)")
+        path, selected_filter = QFileDialog.getSaveFileName(self.main_window, "Save Backup As", "",
+                                                            f"CSV Files (*.csv);;{GZIP_CSV_FILTER};;{SQLITE_BACKUP_FILTER}")
         if not path:
             return
+        if selected_filter == SQLITE_BACKUP_FILTER or path.endswith('.db'):
+            self._export_sqlite_backup(path if path.endswith('.db') else f"{path}.db")
+            return
 
-        base_path = path[:-4] if path.endswith('.csv') else path
-        accounts_path = f"{base_path}_accounts.csv"
-        pages_path = f"{base_path}_pages.csv"
-
-        try:
-            success, headers, data = db.get_table_data_for_export('accounts')
-            if not success:
-                raise IOError(f"Failed to fetch accounts: {data}")
-            with open(accounts_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                writer.writerows(data)
-            
-            success, headers, data = db.get_table_data_for_export('pages')
-            if not success:
-                raise IOError(f"Failed to fetch pages: {data}")
-            with open(pages_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                writer.writerows(data)
+        compress = selected_filter == GZIP_CSV_FILTER or path.endswith('.gz')
+        base_path = path
+        for extension in ('.gz', '.csv'):
+            if base_path.endswith(extension):
+                base_path = base_path[:-len(extension)]
 
+        # Rows are streamed to disk in batches, so memory use stays flat for any table size
+        success, result = db.export_csv_backup(base_path, compress)
+        if success:
             QMessageBox.information(self.main_window, "Export Successful", 
-                                  f"Data backed up to:\n{accounts_path}\n{pages_path}")
-        except Exception as e:
-            log.error(f"Export error: {e}")
-            QMessageBox.critical(self.main_window, "Export Failed", str(e))
+                                  "Data backed up to:\n" + "\n".join(result))
+        else:
+            log.error(f"Export error: {result}")
+            QMessageBox.critical(self.main_window, "Export Failed", result)
+
+    def _export_sqlite_backup(self, path):
+        dialog, progress = self._page_progress_dialog("Backing up database...")
+        success, message = db.create_backup(path, progress)
+        dialog.close()
+        if success:
+            QMessageBox.information(self.main_window, "Export Successful", f"Database backed up to:\n{path}")
+        else:
+            QMessageBox.critical(self.main_window, "Export Failed", message)
 
     def open_import_dialog(self):
         path, _ = QFileDialog.getOpenFileName(self.main_window, "Select Accounts Backup File", 
-                                            "", "Accounts CSV (*_accounts.csv)")
+                                            "", f"Accounts CSV (*_accounts.csv *_accounts.csv.gz);;{SQLITE_BACKUP_FILTER}")
         if not path:
             return
+        if path.endswith('.db'):
+            self._import_sqlite_backup(path)
+            return
 
         accounts_path = path
-        pages_path = path.replace("_accounts.csv", "_pages.csv")
+        pages_path = path.replace("_accounts.csv", "_pages.csv") # Keeps a trailing .gz
+        folders_path = path.replace("_accounts.csv", "_page_folders.csv")
+        if not os.path.exists(folders_path):
+            folders_path = None # Older backups; the folder history is rebuilt from the pages
         if not os.path.exists(pages_path):
             QMessageBox.critical(self.main_window, "Import Failed", 
                                f"Pages file not found at: {pages_path}")
             return
 
+        mode_box = QMessageBox(QMessageBox.Question, "Import Backup",
+                               "How should the backup be imported?\n\n"
+                               "Merge: add new rows and update changed ones, keeping all other data.\n"
+                               "Replace All: delete all current data and replace it with the backup.",
+                               parent=self.main_window)
+        merge_button = mode_box.addButton("Merge", QMessageBox.AcceptRole)
+        replace_button = mode_box.addButton("Replace All", QMessageBox.DestructiveRole)
+        mode_box.addButton(QMessageBox.Cancel)
+        mode_box.setDefaultButton(merge_button)
+        mode_box.exec_()
+        if mode_box.clickedButton() is merge_button:
+            self._merge_csv_backup(accounts_path, pages_path)
+            return
+        if mode_box.clickedButton() is not replace_button:
+            return
+
         reply = QMessageBox.question(self.main_window, 'Confirm Restore', 
-                                   "<b>WARNING:</b> This will delete all current data and replace it with the backup. This is irreversible.\n\nAre you sure?", 
+                                   "<b>WARNING:</b> This will delete all current data and replace it with the backup. This is irreversible.\n\nClose any other open copies of this tool first.\n\nAre you sure?", 
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.No:
             return
 
         try:
-            with open(accounts_path, 'r', encoding='utf-8') as f:
-                accounts_data = list(csv.DictReader(f))
-            with open(pages_path, 'r', encoding='utf-8') as f:
-                pages_data = list(csv.DictReader(f))
-            
-            success, message = db.wipe_and_restore_database(accounts_data, pages_data)
+            success, message = self._restore_csv_backup(accounts_path, pages_path, folders_path)
             if not success:
                 raise Exception(message)
             
@@ -86,6 +121,88 @@ class DialogHandler:
             log.error(f"Import error: {e}")
             QMessageBox.critical(self.main_window, "Import Failed", str(e))
 
+    def _busy_dialog(self, label):
+        dialog = QProgressDialog(label, None, 0, 0, self.main_window)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        return dialog
+
+    def _wait_with_progress(self, future, dialog, describe_progress):
+        """Keeps the UI painting until future is done, showing describe_progress() as it goes."""
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except FutureTimeoutError:
+                dialog.setLabelText(describe_progress())
+                QApplication.processEvents()
+
+    def _restore_csv_backup(self, accounts_path, pages_path, folders_path=None):
+        """Builds a new database file from the CSV files in the background, then swaps it in."""
+        restored = {'accounts': 0, 'pages': 0}
+        def progress(table_name, count):
+            restored[table_name] = count # Called on the loading thread; only read here
+
+        dialog = self._busy_dialog("Restoring backup...")
+        try:
+            with db.open_csv_file(accounts_path) as accounts_file, db.open_csv_file(pages_path) as pages_file, \
+                    (db.open_csv_file(folders_path) if folders_path else nullcontext()) as folders_file, \
+                    ThreadPoolExecutor(max_workers=1) as pool:
+                future = pool.submit(db.stage_restore_from_rows, csv.DictReader(accounts_file),
+                                     csv.DictReader(pages_file), progress,
+                                     csv.DictReader(folders_file) if folders_file else None)
+                success, result = self._wait_with_progress(
+                    future, dialog, lambda: f"Loaded {restored['accounts']} accounts and {restored['pages']} pages...")
+            if not success:
+                return (False, result)
+            dialog.setLabelText("Replacing database...")
+            return db.replace_database(result) # The live data is untouched until this swap
+        finally:
+            dialog.close()
+
+    def _merge_csv_backup(self, accounts_path, pages_path):
+        """Merges both CSV files into the current data on the writer thread and shows what changed."""
+        loaded = {}
+        def progress(table_name, count):
+            loaded[table_name] = count # Called on the writer thread; only read here
+
+        dialog = self._busy_dialog("Merging backup...")
+        try:
+            with db.open_csv_file(accounts_path) as accounts_file, db.open_csv_file(pages_path) as pages_file:
+                future = db.submit_write(db.merge_import, csv.DictReader(accounts_file),
+                                         csv.DictReader(pages_file), progress)
+                success, report = self._wait_with_progress(
+                    future, dialog, lambda: f"Compared {sum(loaded.values())} rows...")
+        except Exception as e:
+            success, report = False, str(e)
+        finally:
+            dialog.close()
+
+        if not success:
+            log.error(f"Merge import error: {report}")
+            QMessageBox.critical(self.main_window, "Import Failed", report)
+            return
+        summary = "\n".join(f"{table.title()}: {counts['inserted']} added, {counts['updated']} updated, "
+                            f"{counts['unchanged']} unchanged, {counts['uid_conflicts']} UID conflicts, {counts['skipped']} skipped"
+                            for table, counts in report.items())
+        QMessageBox.information(self.main_window, "Merge Complete", summary)
+        self.main_window.refresh_all_data()
+
+    def _import_sqlite_backup(self, path):
+        reply = QMessageBox.question(self.main_window, 'Confirm Restore', 
+                                   "<b>WARNING:</b> This will replace the whole database with the backup. This is irreversible.\n\nClose any other open copies of this tool first.\n\nAre you sure?", 
+                                   QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.No:
+            return
+
+        dialog, progress = self._page_progress_dialog("Restoring database...")
+        success, message = db.restore_backup(path, progress)
+        dialog.close()
+        if not success:
+            QMessageBox.critical(self.main_window, "Import Failed", message)
+            return
+        QMessageBox.information(self.main_window, "Restore Successful", "Data successfully restored.")
+        self.main_window.refresh_all_data()
+
     def open_column_settings_dialog(self):
         view_type = 'unified'
         if self.main_widget.split_view_checkbox.isChecked():
@@ -99,6 +216,14 @@ class DialogHandler:
             settings_handler.save_settings(self.main_window.settings)
             self.main_window.refresh_all_data()
 
+    def open_query_stats_dialog(self):
+        database_settings = self.main_window.settings['database']
+        dialog = QueryStatsDialog(database_settings, db.get_query_stats, db.reset_query_stats, self.main_window)
+        if dialog.exec_() == QDialog.Accepted:
+            database_settings = dialog.get_updated_settings()
+            db.configure_query_stats(database_settings['query_stats'], database_settings['slow_query_ms'])
+            settings_handler.save_settings(self.main_window.settings)
+
     def open_note_dialog(self, table, row, item_id, item_type):
         header_map = {table.horizontalHeaderItem(i).data(256): i for i in range(table.columnCount())}
         note_col_index = header_map.get('note')
@@ -187,6 +312,8 @@ class DialogHandler:
                    'linked_account_id', 'video_folder', 'reels_folder', 'photo_folder', 'followers', 'last_interaction']
             
             page_data = dict(zip(cols, details))
+            success, folders = db.get_used_folders(page_id)
+            page_data['used_folders'] = folders if success else []
             return page_data
             
         except Exception as e:
@@ -313,6 +440,8 @@ class DialogHandler:
                'photo_schedule_date', 'photo_posts_per_day', 'note', 'status', 'monetization', 'is_deleted', 
                'linked_account_id', 'video_folder', 'reels_folder', 'photo_folder', 'followers', 'last_interaction']
         data = dict(zip(cols, details))
+        success, folders = db.get_used_folders(page_id)
+        data['used_folders'] = folders if success else []
         
         dialog = EditPageDialog(data, self.main_window)
         if dialog.exec_() == QDialog.Accepted:
@@ -326,24 +455,31 @@ class DialogHandler:
             else:
                 QMessageBox.critical(self.main_window, "Update Error", f"Failed to update page: {msg}")
 
+    def _find_profile(self, profile_id):
+        """Case-insensitive profile_id lookup for the bulk add dialog. Returns (profile_id, account_name) or None."""
+        success, account = db.find_account_by_profile_id(profile_id)
+        return account[1:] if success and account else None
+
     def open_bulk_add_pages_dialog(self):
-        success, profile_map = db.get_profile_id_map()
-        if not success:
-            QMessageBox.critical(self.main_window, "DB Error", f"Could not load profiles: {profile_map}")
-            return
-        
         page_cats = sorted(list(set(p[3] for p in self.main_window._full_pages_cache if p[3])))
-        dialog = AdvancedBulkAddPagesDialog(profile_map, page_cats, self.main_window)
+        dialog = AdvancedBulkAddPagesDialog(self._find_profile, page_cats, self.main_window)
         
         if dialog.exec_() == QDialog.Accepted:
             data = dialog.get_data()
             if not data:
                 return
-            success, msg = db.bulk_add_pages(data)
-            if success:
+            success, report = db.bulk_add_pages(data)
+            if not success:
+                QMessageBox.critical(self.main_window, "DB Error", f"Failed to add pages: {report}")
+                return
+            if report['unmatched']:
+                missing = sorted({page['profile_id'] for page in report['unmatched']})
+                shown = ', '.join(missing[:20]) + (f" and {len(missing) - 20} more" if len(missing) > 20 else '')
+                QMessageBox.warning(self.main_window, "Some Pages Not Added",
+                                    f"Added {report['added']} page(s). {len(report['unmatched'])} page(s) were skipped "
+                                    f"because no account has these Profile IDs:\n{shown}")
+            if report['added']:
                 self.main_window.refresh_all_data()
-            else:
-                QMessageBox.critical(self.main_window, "DB Error", f"Failed to add pages: {msg}")
 
     def open_bulk_edit_pages_dialog(self, page_ids):
         success, data = db.get_multiple_pages_details(page_ids)
@@ -369,19 +505,88 @@ class DialogHandler:
         dialog = ImportAccountsDialog(self.main_window)
         if dialog.exec_() == QDialog.Accepted:
             data = dialog.get_data()
-            records = self._prepare_records_for_import(data)
-            if not records:
+            if data.get('file_path'):
+                self._import_accounts_file(data)
+                return
+            rows = [db.normalize_account_record(record) for record in self._prepare_records_for_import(data)]
+            if not any(rows):
                 QMessageBox.warning(self.main_window, "No Data", "No valid records to import.")
                 return
-            
-            success, msg = db.bulk_import_accounts(records)
+            success, report = db.check_import_duplicates(map(db.account_import_key, rows))
+            if not success:
+                QMessageBox.critical(self.main_window, "Import Error", f"Could not check for duplicates: {report}")
+                return
+            if not self._confirm_import_preview(report):
+                return
+
+            success, msg = db.import_normalized_accounts([row for row in rows if row])
             if success:
                 QMessageBox.information(self.main_window, "Success", f"Import complete. {msg} records processed.")
                 self.main_window.refresh_all_data()
             else:
                 QMessageBox.critical(self.main_window, "Import Error", f"An error occurred: {msg}")
 
+    def _confirm_import_preview(self, report):
+        """Lists the rows an import would skip, with reasons, and asks to go ahead. True if there is nothing to skip."""
+        conflicts = report['conflicts']
+        if not conflicts:
+            return True
+        lines = [f"Row {row}: {profile_id or '(no Profile ID)'} - {'; '.join(reasons)}"
+                 for row, profile_id, reasons in conflicts[:PREVIEW_CONFLICT_LINES]]
+        if len(conflicts) > PREVIEW_CONFLICT_LINES:
+            lines.append(f"... and {len(conflicts) - PREVIEW_CONFLICT_LINES:,} more")
+        summary = f"{report['new']:,} of {report['rows']:,} row(s) can be added. {len(conflicts):,} row(s) will be skipped; see the details for why."
+        if not report['new']:
+            box = QMessageBox(QMessageBox.Warning, "Nothing to Import", summary, QMessageBox.Ok, self.main_window)
+        else:
+            box = QMessageBox(QMessageBox.Question, "Import Preview", summary, QMessageBox.Yes | QMessageBox.No, self.main_window)
+            box.button(QMessageBox.Yes).setText("Import")
+        box.setDetailedText('\n'.join(lines))
+        return box.exec_() == QMessageBox.Yes
+
+    def _import_accounts_file(self, data):
+        """Previews, then runs the multi-process file import in the background, showing rows per second."""
+        checked = {'rows': 0}
+        def preview_progress(rows):
+            checked['rows'] = rows # Called on the preview thread; only read here
+
+        dialog = self._busy_dialog("Checking accounts...")
+        try:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                future = pool.submit(db.preview_accounts_file, data['file_path'], data['separator'], data['mapping'], preview_progress)
+                success, report = self._wait_with_progress(future, dialog, lambda: f"Checked {checked['rows']:,} rows...")
+        finally:
+            dialog.close()
+        if not success:
+            QMessageBox.critical(self.main_window, "Import Error", f"Could not check the file: {report}")
+            return
+        if not self._confirm_import_preview(report):
+            return
+
+        status = {'done': 0, 'rate': 0}
+        def progress(done, rows_per_sec):
+            status['done'], status['rate'] = done, rows_per_sec # Called on the import thread; only read here
+
+        dialog = self._busy_dialog("Importing accounts...")
+        try:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                future = pool.submit(db.import_accounts_file, data['file_path'], data['separator'], data['mapping'], progress)
+                success, result = self._wait_with_progress(
+                    future, dialog, lambda: f"Processed {status['done']:,} rows ({status['rate']:,.0f} rows/sec)...")
+        finally:
+            dialog.close()
+
+        if not success:
+            QMessageBox.critical(self.main_window, "Import Error", f"An error occurred: {result}")
+        else:
+            QMessageBox.information(self.main_window, "Success",
+                                    f"Import complete in {result['seconds']:.1f}s ({result['rows_per_sec']:,.0f} rows/sec).\n\n"
+                                    f"Added: {result['imported']:,}\nAlready present: {result['duplicates']:,}\n"
+                                    f"Rejected (missing Profile ID or name): {result['rejected']:,}")
+        self.main_window.refresh_all_data()
+
     def _prepare_records_for_import(self, data):
+        """One record per non-blank line, including incomplete ones, so preview row numbers match the lines."""
         lines, sep, mapping = data['text_data'].strip().split('\n'), data['separator'], data['mapping']
         if not all([lines, sep, mapping]):
             return []
@@ -390,9 +595,7 @@ class DialogHandler:
             if not line.strip():
                 continue
             parts = line.strip().split(sep)
-            record = {db_col: parts[i] for i, db_col in mapping.items() if i < len(parts)}
-            if record.get('profile_id') and record.get('account_name'):
-                records.append(record)
+            records.append({db_col: parts[i] for i, db_col in mapping.items() if i < len(parts)})
         return records
 
     def delete_selected_items(self):
@@ -407,8 +610,9 @@ class DialogHandler:
                                    f'Move {len(items_to_delete)} item(s) to Recycle Bin?', 
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            for item_type, item_id in items_to_delete: 
-                db.soft_delete(item_type, item_id)
+            success, result = db.soft_delete_items(items_to_delete)
+            if not success:
+                QMessageBox.critical(self.main_window, "DB Error", f"Could not delete items: {result}")
             self.main_window.refresh_all_data()
 
     def open_recycle_bin(self):
@@ -425,8 +629,9 @@ class DialogHandler:
             return
 
         if result == 1:  # Restore
-            for item_type, item_id in selected:
-                db.restore_item(item_type, item_id)
+            success, result = db.restore_items(selected)
+            if not success:
+                QMessageBox.critical(self.main_window, "DB Error", f"Could not restore items: {result}")
         elif result == 2:  # Delete Permanently
             self._permanently_delete_items_from_recycle_bin(selected)
         
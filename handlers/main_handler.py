@@ -31,6 +31,9 @@ class UIEventHandler:
 
     def open_column_settings_dialog(self):
         self.dialog_handler.open_column_settings_dialog()
+
+    def open_query_stats_dialog(self):
+        self.dialog_handler.open_query_stats_dialog()
     
     def open_add_account_dialog(self):
         self.dialog_handler.open_add_account_dialog()
@@ -1,5 +1,6 @@
 import sys
 import traceback
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox, 
                              QLabel, QStatusBar)
 from PyQt5.QtCore import QItemSelectionModel, QTimer
@@ -7,7 +8,8 @@ from utils import log, settings_handler
 import database as db
 from ui_main_window import MainUI
 from handlers import UIEventHandler
-from views import populate_unified_table, populate_accounts_table, populate_pages_table
+from views import (populate_unified_table, populate_accounts_table, populate_pages_table,
+                   patch_unified_table, patch_split_tables)
 
 
 def handle_exception(exc_type, exc_value, exc_traceback):
@@ -22,6 +24,8 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 
 class MainWindow(QMainWindow):
     PAGE_SIZE = 100 
+    CHANGE_POLL_INTERVAL_MS = 2000 # How often to check for commits from other app instances
+    CHANGELOG_PRUNE_INTERVAL_MS = 60 * 60 * 1000 # How often to drop old change log entries while running
 
     def __init__(self):
         super().__init__()
@@ -38,13 +42,23 @@ class MainWindow(QMainWindow):
         self._full_pages_cache = []
         self._accounts_with_pages_loaded = set()
         
-        self._current_offset_unified = 0
+        # Keyset pagination state: the last profile_id loaded and whether more rows remain
+        self._last_profile_id_unified = None
+        self._has_more_unified = False
         self._total_accounts_unified = 0
         self._is_loading_unified = False
-        self._current_offset_accounts = 0
-        self._total_accounts_split = 0
+        self._last_profile_id_accounts = None
+        self._has_more_accounts = False
         self._is_loading_accounts = False
         
+        # Background reads: a result is applied only if no newer load started meanwhile
+        self._unified_load_generation = 0
+        self._filters_generation = 0
+        
+        # Change tracking: the last changelog entry already reflected in the UI
+        self._data_version = None
+        self._last_change_seq = 0
+        
         self.setup_status_bar()
         self.setup_connections()
         self.apply_styles()
@@ -52,6 +66,14 @@ class MainWindow(QMainWindow):
         
         # ADDED: Initial grid setup after UI is fully loaded
         QTimer.singleShot(1000, self.refresh_ui_grids)
+        
+        self.change_poll_timer = QTimer(self)
+        self.change_poll_timer.timeout.connect(self._poll_external_changes)
+        self.change_poll_timer.start(self.CHANGE_POLL_INTERVAL_MS)
+        
+        self.changelog_prune_timer = QTimer(self)
+        self.changelog_prune_timer.timeout.connect(self._prune_changelog)
+        self.changelog_prune_timer.start(self.CHANGELOG_PRUNE_INTERVAL_MS)
 
     # ADDED: Grid refresh method for all tables
     def refresh_ui_grids(self):
@@ -89,6 +111,7 @@ class MainWindow(QMainWindow):
         from PyQt5.QtWidgets import QMenu
         settings_menu = QMenu(self)
         settings_menu.addAction("Column Settings...").triggered.connect(eh.open_column_settings_dialog)
+        settings_menu.addAction("Query Statistics...").triggered.connect(eh.open_query_stats_dialog)
         self.main_widget.settings_btn.setMenu(settings_menu)
         
         self.main_widget.unified_table.customContextMenuRequested.connect(eh.setup_context_menu)
@@ -144,6 +167,10 @@ class MainWindow(QMainWindow):
         self.main_widget.search_input.clear()
         self._accounts_with_pages_loaded.clear()
         
+        # Read before loading, so changes committed meanwhile are picked up by the next poll
+        success, seq = db.get_latest_change_seq()
+        if success:
+            self._last_change_seq = seq
         if self._load_pages_to_cache():
             self.populate_filters()
             settings_handler.apply_table_layout(self.main_widget.unified_table, self.settings, 'unified')
@@ -154,6 +181,103 @@ class MainWindow(QMainWindow):
             # ADDED: Grid refresh after complete refresh
             self.refresh_ui_grids()
 
+    def _poll_external_changes(self):
+        """Applies rows changed by other connections since the last refresh or poll."""
+        success, version = db.get_data_version()
+        if not success or version == self._data_version:
+            return
+        if self._is_loading_unified or self._is_loading_accounts:
+            return # Try again on the next tick
+        success, result = db.get_changes_since(self._last_change_seq, skip_own=True) # Local saves refresh themselves
+        if not success:
+            log.error(f"Failed to read change log: {result}")
+            return
+        self._data_version = version
+        latest_seq, changes = result
+        if changes is None:
+            # Also the case after a restore swapped in a database whose change log starts over
+            log.info("Change log was pruned or restarted past our last refresh; reloading everything.")
+            self.refresh_all_data()
+            return
+        self._last_change_seq = latest_seq
+        if changes:
+            self._apply_external_changes(changes)
+
+    def _prune_changelog(self):
+        """Drops change log entries past the retention period, so a long-running session keeps the table small."""
+        success, result = db.prune_changelog()
+        if not success:
+            log.error(f"Failed to prune change log: {result}")
+
+    def _apply_external_changes(self, changes):
+        """Patches the pages cache and the visible rows with the rows other instances changed."""
+        page_ids = {row_id for table, row_id, _ in changes if table == 'pages'}
+        account_ids = {row_id for table, row_id, _ in changes if table == 'accounts'}
+        fresh_pages = {}
+        for ids_filter in ({'page_ids': list(page_ids)}, {'account_ids': list(account_ids)}):
+            if not any(ids_filter.values()):
+                continue
+            success, rows = db.get_all_pages_data(**ids_filter)
+            if not success:
+                log.error(f"Failed to load changed pages: {rows}")
+                return
+            fresh_pages.update((row[0], row) for row in rows)
+
+        # Pages of changed accounts are replaced too, since rows embed the account's profile_id and name
+        old_pages = {p[0]: p for p in self._full_pages_cache if p[0] in page_ids or p[16] in account_ids}
+        pages = {page_id: fresh_pages.get(page_id) for page_id in page_ids | old_pages.keys() | fresh_pages.keys()}
+        moved_page_ids = {page_id for page_id, page in fresh_pages.items()
+                          if page_id in old_pages and old_pages[page_id][16] != page[16]}
+
+        # Accounts whose pages came or went are reloaded as well, for their page counts
+        account_ids |= {p[16] for p in old_pages.values()} | {p[16] for p in fresh_pages.values()}
+        fresh_accounts = {}
+        if account_ids:
+            success, rows = db.get_all_accounts_data(account_ids_to_include=list(account_ids))
+            if not success:
+                log.error(f"Failed to load changed accounts: {rows}")
+                return
+            fresh_accounts = {row[0]: row for row in rows}
+        accounts = {acc_id: fresh_accounts.get(acc_id) for acc_id in account_ids}
+
+        kept = [p for p in self._full_pages_cache if p[0] not in pages]
+        self._full_pages_cache = sorted(kept + list(fresh_pages.values()), key=lambda page: (page[22], page[1]))
+        log.info(f"Applied {len(changes)} change(s) from other connections.")
+        self.populate_filters()
+        self._patch_visible_rows(accounts, pages, moved_page_ids)
+        self.update_status_bar()
+
+    def _patch_visible_rows(self, accounts, pages, moved_page_ids):
+        """Updates the changed rows of the current view in place, keeping scroll position and selection."""
+        search_text = self.main_widget.search_input.text().lower()
+        page_category = self.main_widget.page_category_filter.currentText()
+        account_category = self.main_widget.account_category_filter.currentText()
+        known_pages = {page[0]: page for page in self._full_pages_cache}
+        split_view = self.main_widget.split_view_checkbox.isChecked()
+        has_more = self._has_more_accounts if split_view else self._has_more_unified
+        last_profile_id = self._last_profile_id_accounts if split_view else self._last_profile_id_unified
+
+        def show_new_account(acc_data):
+            # Whether a new account matches a search is left to the next search
+            if search_text or account_category not in ('All Categories', acc_data[4]):
+                return False
+            return not has_more or (last_profile_id is not None and acc_data[1] <= last_profile_id)
+
+        def show_new_page(page_data):
+            return self._page_matches(page_data, search_text, page_category)
+
+        if split_view:
+            visible_account_ids = {self.get_item_info_from_row(self.main_widget.accounts_table, r)[1]
+                                   for r in range(self.main_widget.accounts_table.rowCount())}
+            patch_split_tables(self.main_widget.accounts_table, self.main_widget.pages_table, accounts, pages,
+                               moved_page_ids, known_pages, search_text, self.settings, show_new_account,
+                               lambda page_data: (page_data[16] in self._accounts_with_pages_loaded and
+                                                  page_data[16] in visible_account_ids and show_new_page(page_data)))
+        else:
+            patch_unified_table(self.main_widget.unified_table, accounts, pages, moved_page_ids, known_pages,
+                                search_text, self.main_widget.show_view_filter.currentText(), self.settings,
+                                show_new_account, show_new_page)
+
     def populate_filters(self):
         self.main_widget.page_category_filter.blockSignals(True)
         current_page_cat = self.main_widget.page_category_filter.currentText()
@@ -165,11 +289,19 @@ class MainWindow(QMainWindow):
         if idx != -1: self.main_widget.page_category_filter.setCurrentIndex(idx)
         self.main_widget.page_category_filter.blockSignals(False)
 
+        self._filters_generation += 1
+        generation = self._filters_generation
+        db.read_in_background(self, lambda result: self._on_account_categories_loaded(generation, result),
+                              db.get_unique_account_categories)
+
+    def _on_account_categories_loaded(self, generation, result):
+        if generation != self._filters_generation:
+            return
+        success, acc_categories = result
         self.main_widget.account_category_filter.blockSignals(True)
         current_acc_cat = self.main_widget.account_category_filter.currentText()
         self.main_widget.account_category_filter.clear()
         self.main_widget.account_category_filter.addItem("All Categories")
-        success, acc_categories = db.get_unique_account_categories()
         if success: self.main_widget.account_category_filter.addItems(acc_categories)
         idx = self.main_widget.account_category_filter.findText(current_acc_cat)
         if idx != -1: self.main_widget.account_category_filter.setCurrentIndex(idx)
@@ -185,20 +317,21 @@ class MainWindow(QMainWindow):
         log.info(f"Page caching complete. {len(all_pages)} pages.")
         return True
 
+    @staticmethod
+    def _page_matches(page, search_text, page_category):
+        """Whether a cached page row passes the page category filter and the (lowercase) search text."""
+        if page_category != 'All Categories' and page[3] != page_category:
+            return False
+        if not search_text:
+            return True
+        search_fields = list(page[1:5]) + [page[6], page[12], page[13], page[17], page[18], page[20], page[21]]
+        return any(search_text in str(field or '').lower() for field in search_fields)
+
     def _filter_pages_from_cache(self):
         search_text = self.main_widget.search_input.text().lower()
         page_category = self.main_widget.page_category_filter.currentText()
         
-        filtered_pages = []
-        if search_text:
-            for page in self._full_pages_cache:
-                search_fields = list(page[1:5]) + [page[6], page[12], page[13], page[17], page[18], page[20], page[21]]
-                if any(search_text in str(field or '').lower() for field in search_fields):
-                    filtered_pages.append(page)
-        else:
-            filtered_pages = self._full_pages_cache
-
-        final_pages = [p for p in filtered_pages if page_category == 'All Categories' or p[3] == page_category]
+        final_pages = [p for p in self._full_pages_cache if self._page_matches(p, search_text, page_category)]
 
         pages_by_account_id = {}
         for page_row in final_pages:
@@ -240,7 +373,8 @@ class MainWindow(QMainWindow):
         table = self.main_widget.unified_table
         if is_new_load:
             table.setRowCount(0)
-            self._current_offset_unified = 0
+            self._last_profile_id_unified = None
+            self._total_accounts_unified = 0
         
         search_text = self.main_widget.search_input.text().lower()
         account_category = self.main_widget.account_category_filter.currentText()
@@ -248,19 +382,30 @@ class MainWindow(QMainWindow):
         
         pages_by_account_id, account_ids_from_page_search = self._filter_pages_from_cache()
         
-        success, accounts_chunk = db.get_all_accounts_data(search_text, account_category, self.PAGE_SIZE, self._current_offset_unified, account_ids_from_page_search)
+        self._unified_load_generation += 1
+        generation = self._unified_load_generation
+        on_loaded = lambda result: self._on_unified_chunk_loaded(generation, result, pages_by_account_id, search_text, show_view)
+        db.read_in_background(self, on_loaded, db.get_all_accounts_data, search_text, account_category, self.PAGE_SIZE,
+                              account_ids_to_include=account_ids_from_page_search,
+                              after_profile_id=self._last_profile_id_unified)
+
+    def _on_unified_chunk_loaded(self, generation, result, pages_by_account_id, search_text, show_view):
+        if generation != self._unified_load_generation:
+            return # A newer load replaced this one
+        self._is_loading_unified = False
+        success, accounts_chunk = result
         if not success:
             QMessageBox.critical(self, "Database Error", f"Failed to load accounts:\n{accounts_chunk}")
-            self._is_loading_unified = False; return
-
-        if is_new_load:
-            self._total_accounts_unified = len(accounts_chunk)
+            return
 
+        table = self.main_widget.unified_table
         populate_unified_table(table, accounts_chunk, pages_by_account_id, search_text, show_view, self.settings)
 
-        self._current_offset_unified += len(accounts_chunk)
+        self._total_accounts_unified += len(accounts_chunk)
+        if accounts_chunk:
+            self._last_profile_id_unified = accounts_chunk[-1][1]
+        self._has_more_unified = len(accounts_chunk) == self.PAGE_SIZE
         self.update_status_bar()
-        self._is_loading_unified = False
         
         # ADDED: Grid refresh after data loading
         self.refresh_ui_grids()
@@ -274,8 +419,7 @@ class MainWindow(QMainWindow):
         pages_table = self.main_widget.pages_table
         
         if is_new_load:
-            accounts_table.setRowCount(0)
-            self._current_offset_accounts = 0
+            self._last_profile_id_accounts = None
         
         search_text = self.main_widget.search_input.text().lower()
         account_category = self.main_widget.account_category_filter.currentText()
@@ -283,12 +427,14 @@ class MainWindow(QMainWindow):
 
         _, account_ids_from_page_matches = self._filter_pages_from_cache()
         
-        success, accounts_chunk = db.get_all_accounts_data(search_text, account_category, self.PAGE_SIZE, self._current_offset_accounts, account_ids_from_page_matches)
+        success, accounts_chunk = db.get_all_accounts_data(search_text, account_category, self.PAGE_SIZE,
+                                                           account_ids_to_include=account_ids_from_page_matches,
+                                                           after_profile_id=self._last_profile_id_accounts)
         if not success:
             QMessageBox.critical(self, "Database Error", f"Failed to load accounts:\n{accounts_chunk}")
             self._is_loading_accounts = False; return
         
-        populate_accounts_table(accounts_table, accounts_chunk, self._full_pages_cache, search_text, self.settings)
+        populate_accounts_table(accounts_table, accounts_chunk, search_text, self.settings, is_new_load)
         
         pages_to_show = []
         visible_account_ids = {self.get_item_info_from_row(accounts_table, r)[1] for r in range(accounts_table.rowCount())}
@@ -297,18 +443,14 @@ class MainWindow(QMainWindow):
             page_account_id = page[16]
             if (page_account_id in self._accounts_with_pages_loaded and
                 page_account_id in visible_account_ids and
-                (page_category == "All Categories" or page[3] == page_category)):
-                
-                if search_text:
-                    search_fields = list(page[1:5]) + [page[6], page[12], page[13], page[17], page[18], page[20], page[21]]
-                    if any(search_text in str(field or '').lower() for field in search_fields):
-                        pages_to_show.append(page)
-                else:
-                    pages_to_show.append(page)
+                self._page_matches(page, search_text, page_category)):
+                pages_to_show.append(page)
 
         populate_pages_table(pages_table, pages_to_show, search_text, self.settings)
         
-        self._current_offset_accounts += len(accounts_chunk)
+        if accounts_chunk:
+            self._last_profile_id_accounts = accounts_chunk[-1][1]
+        self._has_more_accounts = len(accounts_chunk) == self.PAGE_SIZE
         self.update_status_bar()
         self._is_loading_accounts = False
         
@@ -333,13 +475,13 @@ class MainWindow(QMainWindow):
     def _on_unified_scroll(self, value):
         scrollbar = self.main_widget.unified_table.verticalScrollBar()
         if value >= scrollbar.maximum() - 20:
-            if not self._is_loading_unified and self._current_offset_unified < self._total_accounts_unified:
+            if not self._is_loading_unified and self._has_more_unified:
                 self.load_unified_view(is_new_load=False)
 
     def _on_accounts_scroll(self, value):
         scrollbar = self.main_widget.accounts_table.verticalScrollBar()
         if value >= scrollbar.maximum() - 20:
-            if not self._is_loading_accounts and self._current_offset_accounts < self._total_accounts_split:
+            if not self._is_loading_accounts and self._has_more_accounts:
                 self.load_split_view(is_new_load=False)
     
     def on_account_selected(self):
@@ -367,11 +509,17 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # The account file import uses worker processes
     sys.excepthook = handle_exception
     log.info("====================================")
     log.info("Application starting...")
     
+    database_settings = settings_handler.load_settings()['database']
+    db.apply_performance_profile(database_settings.get('profile', 'balanced'), database_settings.get('overrides'))
+    db.configure_query_stats(database_settings.get('query_stats', False), database_settings.get('slow_query_ms', db.DEFAULT_SLOW_QUERY_MS))
     db.create_tables()
+    db.start_writer()
+    db.prune_changelog()
     
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
@@ -379,4 +527,8 @@ if __name__ == "__main__":
     main_win = MainWindow()
     main_win.show()
     
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    db.shutdown_readers()
+    db.stop_writer()
+    db.close_all_connections()
+    sys.exit(exit_code)
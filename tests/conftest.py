@@ -0,0 +1,25 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+from database import connection, migrations
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh database file with the current schema and a running writer thread."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(connection, 'DATABASE_NAME', str(tmp_path / 'pagedata.db'))
+    connection.close_all_connections()
+    migrations.create_tables()
+    db.start_writer()
+    yield tmp_path
+    db.shutdown_readers()
+    db.stop_writer()
+    connection.close_all_connections()
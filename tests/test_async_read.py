@@ -0,0 +1,50 @@
+# tests/test_async_read.py
+
+import threading
+import time
+
+import pytest
+
+from PyQt5.QtCore import QCoreApplication
+
+import database as db
+from database import async_read, connection
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _blocked_read(release):
+    release.wait(5)
+    return (True, 'stale')
+
+
+def _process_events(app, until, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+
+
+def test_reads_outliving_a_restore_are_dropped_silently(database, app, monkeypatch):
+    futures = []
+    submit_read = async_read.submit_read
+    monkeypatch.setattr(async_read, 'submit_read', lambda *args: futures.append(submit_read(*args)) or futures[-1])
+    release = threading.Event()
+    results = []
+    # Both workers are busy, so the last read is still queued when the readers shut down
+    for _ in range(async_read.READ_WORKERS + 1):
+        db.read_in_background(None, results.append, _blocked_read, release)
+    db.shutdown_readers(wait=False)
+    connection.close_all_connections()
+    release.set()
+    _process_events(app, lambda: all(future.done() for future in futures))
+    assert futures[-1].cancelled()
+    assert results == []
+
+    db.read_in_background(None, results.append, db.get_latest_change_seq)
+    _process_events(app, lambda: results)
+    assert len(results) == 1 and results[0][0]
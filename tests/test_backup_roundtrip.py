@@ -0,0 +1,75 @@
+# tests/test_backup_roundtrip.py
+
+import csv
+import sqlite3
+
+import database as db
+from database import connection
+
+
+def _add_accounts_without_uid(count):
+    for i in range(count):
+        success, _ = db.add_account({'profile_id': f"P{i:03d}", 'account_name': f"Account {i}", 'uid': '', 'category': ''})
+        assert success
+
+
+def _uids():
+    return connection.get_connection().execute("SELECT profile_id, uid FROM accounts ORDER BY profile_id").fetchall()
+
+
+def test_csv_export_of_accounts_without_uid_restores(database):
+    _add_accounts_without_uid(5)
+    success, paths = db.export_csv_backup(str(database / 'backup'))
+    assert success
+
+    accounts_path, pages_path, _ = paths
+    with db.open_csv_file(accounts_path) as accounts, db.open_csv_file(pages_path) as pages:
+        success, message = db.restore_from_rows(csv.DictReader(accounts), csv.DictReader(pages))
+    assert success, message
+    assert _uids() == [(f"P{i:03d}", None) for i in range(5)]
+
+
+def test_wipe_and_restore_keeps_accounts_without_uid(database):
+    rows = [{'profile_id': f"P{i:03d}", 'account_name': f"Account {i}", 'uid': ''} for i in range(5)]
+    success, message = db.wipe_and_restore_database(rows, [])
+    assert success, message
+    assert _uids() == [(f"P{i:03d}", None) for i in range(5)]
+
+
+def test_restore_is_refused_while_another_connection_has_the_database_open(database):
+    _add_accounts_without_uid(3)
+    other = sqlite3.connect(connection.DATABASE_NAME)
+    try:
+        other.execute("SELECT COUNT(*) FROM accounts").fetchone()
+        rows = [{'profile_id': 'R000', 'account_name': 'Restored', 'uid': ''}]
+        success, message = db.restore_from_rows(rows, [])
+    finally:
+        other.close()
+    assert not success
+    assert 'another copy' in message
+    assert [profile_id for profile_id, _ in _uids()] == ['P000', 'P001', 'P002']
+    assert not (database / 'pagedata.db.restore').exists()
+
+
+def test_csv_backup_keeps_folder_history(database):
+    _add_accounts_without_uid(1)
+    success, _ = db.add_page({'page_name': 'Page', 'uid_page_id': None, 'linked_account_id': 1})
+    assert success
+    success, _ = db.update_page_details(1, {'video_folder': 'D:/video', 'used_folders': ['D:/video', 'D:/other']})
+    assert success
+    conn = connection.get_connection()
+    conn.execute("UPDATE page_folders SET first_used = '2024-01-0' || rowid")
+    conn.commit()
+    history = "SELECT page_id, folder, content_type, first_used FROM page_folders ORDER BY first_used, rowid"
+    before = conn.execute(history).fetchall()
+    assert before == [(1, 'D:/video', 'video', '2024-01-01'), (1, 'D:/other', None, '2024-01-02')]
+
+    success, paths = db.export_csv_backup(str(database / 'backup'))
+    assert success
+    accounts_path, pages_path, folders_path = paths
+    with db.open_csv_file(accounts_path) as accounts, db.open_csv_file(pages_path) as pages, \
+            db.open_csv_file(folders_path) as folders:
+        success, message = db.restore_from_rows(csv.DictReader(accounts), csv.DictReader(pages),
+                                                page_folders_rows=csv.DictReader(folders))
+    assert success, message
+    assert connection.get_connection().execute(history).fetchall() == before
@@ -0,0 +1,63 @@
+# tests/test_changelog.py
+
+import sqlite3
+
+import database as db
+from database import connection
+
+
+def _add_accounts(count, prefix='P'):
+    for i in range(count):
+        success, _ = db.add_account({'profile_id': f"{prefix}{i:03d}", 'account_name': f"Account {i}", 'uid': '', 'category': ''})
+        assert success
+
+
+def test_changes_since_asks_for_reload_after_restore_restarts_the_log(database):
+    _add_accounts(5)
+    success, seq = db.get_latest_change_seq()
+    assert success and seq > 0
+
+    rows = [{'profile_id': 'R000', 'account_name': 'Restored', 'uid': ''}]
+    success, message = db.restore_from_rows(rows, [])
+    assert success, message
+    success, latest = db.get_latest_change_seq()
+    assert success and latest < seq
+
+    success, (latest_seq, changes) = db.get_changes_since(seq)
+    assert success
+    assert changes is None
+    assert latest_seq == latest
+
+
+def test_prune_changelog_keeps_the_newest_entry(database):
+    _add_accounts(3)
+    success, seq = db.get_latest_change_seq()
+    assert success
+    with connection.transaction() as cursor:
+        cursor.execute("UPDATE changelog SET changed_at = datetime('now', '-30 days')")
+
+    success, _ = db.prune_changelog()
+    assert success
+    assert db.get_latest_change_seq() == (True, seq)
+    assert db.get_changes_since(seq) == (True, (seq, []))
+
+
+def test_changes_since_can_skip_this_process_own_changes(database):
+    _add_accounts(1)
+    success, seq = db.get_latest_change_seq()
+    assert success
+
+    _add_accounts(2, prefix='OWN')
+    other = sqlite3.connect(connection.DATABASE_NAME) # Stands in for another app instance
+    try:
+        other.execute("UPDATE accounts SET note = 'edited elsewhere' WHERE profile_id = 'P000'")
+        other.commit()
+        account_id = other.execute("SELECT account_id FROM accounts WHERE profile_id = 'P000'").fetchone()[0]
+    finally:
+        other.close()
+
+    success, (latest_seq, changes) = db.get_changes_since(seq, skip_own=True)
+    assert success
+    assert changes == [('accounts', account_id, 'update')]
+    success, (_, all_changes) = db.get_changes_since(seq)
+    assert len(all_changes) == 3
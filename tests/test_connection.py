@@ -0,0 +1,29 @@
+# tests/test_connection.py
+
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from database import connection
+
+
+def test_connection_of_a_finished_thread_is_closed(database):
+    opened = []
+    worker = threading.Thread(target=lambda: opened.append(connection.get_connection()))
+    worker.start()
+    worker.join()
+    gc.collect()
+
+    conn, = opened
+    assert conn not in connection._pooled_connections
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_live_threads_keep_their_connection(database):
+    conn = connection.get_connection()
+    gc.collect()
+    assert connection.get_connection() is conn
+    assert conn in connection._pooled_connections
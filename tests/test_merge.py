@@ -0,0 +1,67 @@
+# tests/test_merge.py
+
+import database as db
+from database import connection
+
+
+def _account(profile_id, uid=''):
+    return {'profile_id': profile_id, 'account_name': f"Account {profile_id}", 'uid': uid}
+
+
+def test_merge_inserts_every_account_without_uid(database):
+    success, report = db.merge_import([_account(f"P{i}") for i in range(5)], [])
+    assert success, report
+    assert report['accounts'] == {'total': 5, 'inserted': 5, 'updated': 0, 'unchanged': 0, 'uid_conflicts': 0, 'skipped': 0}
+    uids = connection.get_connection().execute("SELECT uid FROM accounts").fetchall()
+    assert uids == [(None,)] * 5
+
+
+def test_merge_counts_uid_conflicts_apart_from_skipped_rows(database):
+    success, _ = db.merge_import([_account('A', 'U1'), _account('B', 'U2')], [])
+    assert success
+
+    rows = [
+        _account('A', 'U1'),  # Unchanged
+        _account('B', 'U1'),  # Update would take A's uid
+        _account('C', 'U2'),  # Insert would take B's uid
+        _account('D'),        # Inserted
+        _account('D'),        # Repeats D
+    ]
+    success, report = db.merge_import(rows, [])
+    assert success, report
+    assert report['accounts'] == {'total': 5, 'inserted': 1, 'updated': 0, 'unchanged': 1, 'uid_conflicts': 2, 'skipped': 1}
+
+
+def _backup_account(account_id, profile_id):
+    return {'account_id': account_id, 'profile_id': profile_id, 'account_name': f"Account {profile_id}", 'uid': ''}
+
+
+def _page(page_name, uid_page_id='', account_id=1, **values):
+    return {'page_id': '', 'page_name': page_name, 'uid_page_id': uid_page_id, 'linked_account_id': account_id, **values}
+
+
+def test_merge_inserts_pages_repeated_in_the_backup_once(database):
+    pages = [
+        _page('One', 'PG1'),
+        _page('One again', 'PG1'),  # Same uid_page_id
+        _page('Two'),
+        _page('Two'),               # Same account and name, no uid
+        _page('Three'),
+    ]
+    success, report = db.merge_import([_backup_account(1, 'A')], pages)
+    assert success, report
+    assert report['pages'] == {'total': 5, 'inserted': 3, 'updated': 0, 'unchanged': 0, 'uid_conflicts': 0, 'skipped': 2}
+    names = connection.get_connection().execute("SELECT page_name FROM pages ORDER BY page_name").fetchall()
+    assert names == [('One',), ('Three',), ('Two',)]
+
+
+def test_merge_update_keeps_blank_columns_null(database):
+    success, _ = db.merge_import([_backup_account(1, 'A')], [_page('One', 'PG1', category='Old')])
+    assert success
+    conn = connection.get_connection()
+    assert conn.execute("SELECT note, monetization FROM pages").fetchone() == (None, None)
+
+    success, report = db.merge_import([_backup_account(1, 'A')], [_page('One', 'PG1', category='New', note='', monetization='')])
+    assert success, report
+    assert report['pages']['updated'] == 1
+    assert conn.execute("SELECT category, note, monetization FROM pages").fetchone() == ('New', None, None)
@@ -0,0 +1,14 @@
+# tests/test_query_plan.py
+
+from database import connection
+from database.query_plan import verify_query_plans
+
+# Large enough that SQLite prefers the indexes, small enough to build in a second;
+# python -m database.query_plan checks the full QUERY_PLAN_SIZES
+TEST_SIZES = [(500, 1500)]
+
+
+def test_read_query_plans_use_their_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(connection, 'DATABASE_NAME', str(tmp_path / 'pagedata.db'))
+    success, report = verify_query_plans(TEST_SIZES)
+    assert success, '\n'.join(line for line in report if not line.startswith('ok'))
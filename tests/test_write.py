@@ -0,0 +1,19 @@
+# tests/test_write.py
+
+import pytest
+
+import database as db
+from database import connection
+
+
+@pytest.mark.parametrize('count', [3, connection.ID_LIST_TEMP_TABLE_THRESHOLD * 4 - 1])
+def test_quick_edit_returns_the_number_of_rows_updated(database, count):
+    with connection.transaction() as cursor:
+        cursor.executemany("INSERT INTO accounts (profile_id, account_name) VALUES (?, ?)",
+                           ((f"P{i:04d}", f"Account {i}") for i in range(count + 1)))
+    success, updated = db.quick_edit_items('account', range(1, count + 1), 'account_category', 'news')
+    assert success
+    assert updated == count
+
+    rows = connection.get_connection().execute("SELECT COUNT(*) FROM accounts WHERE account_category = 'News'").fetchone()[0]
+    assert rows == count
@@ -1,8 +1,18 @@
 # ui_components/sortable_table.py
 
-from PyQt5.QtWidgets import QTableWidget
+from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem
 from PyQt5.QtCore import Qt
 
+SORT_KEY_ROLE = Qt.UserRole + 1 # A value to sort by in place of the displayed text
+
+class SortKeyItem(QTableWidgetItem):
+    """A table item that sorts by its SORT_KEY_ROLE value (e.g. a follower count) rather than its text."""
+    def __lt__(self, other):
+        key, other_key = self.data(SORT_KEY_ROLE), other.data(SORT_KEY_ROLE)
+        if key is None or other_key is None:
+            return super().__lt__(other)
+        return key < other_key
+
 class SortableTableWidget(QTableWidget):
     """
     An enhanced QTableWidget that supports selective column sorting and a custom
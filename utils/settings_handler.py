@@ -86,6 +86,12 @@ def get_default_settings():
             "compact_mode": False, 
             "use_zebra_striping": True, 
             "show_grid": True
+        },
+        "database": {
+            "profile": "balanced",  # safe, balanced or bulk_import
+            "overrides": {},        # e.g. {"cache_size": -131072} to change one pragma of the profile
+            "query_stats": False,   # Collect per-query timings (Settings > Query Statistics...)
+            "slow_query_ms": 200    # Queries at least this slow go to slow_queries.log while collecting
         }
     }
     return settings
@@ -113,6 +119,15 @@ def load_settings():
                     settings['appearance'][key] = value
                     is_dirty = True
         
+        if 'database' not in settings:
+            settings['database'] = default_settings['database']
+            is_dirty = True
+        else:
+            for key, value in default_settings['database'].items():
+                if key not in settings['database']:
+                    settings['database'][key] = value
+                    is_dirty = True
+
         for view_key, default_view in default_settings['columns'].items():
             if view_key not in settings['columns']:
                 settings['columns'][view_key] = default_view
@@ -3,4 +3,5 @@
 # This file makes the 'views' folder a Python package.
 
 from .unified_view_loader import populate_unified_table
-from .split_view_loader import populate_accounts_table, populate_pages_table
\ No newline at end of file
+from .split_view_loader import populate_accounts_table, populate_pages_table
+from .live_update import patch_unified_table, patch_split_tables
@@ -0,0 +1,134 @@
+# views/live_update.py
+
+"""
+Applies rows changed by other app instances to the visible tables in place, so
+scroll position and selection survive. accounts and pages map each changed id to
+its fresh row, or to None once it is gone. A new row is only added where its place
+among the loaded rows is known; the next full load shows the others.
+"""
+
+from PyQt5.QtCore import Qt
+from .split_view_loader import fill_split_account_row, fill_split_page_row
+from .unified_view_loader import fill_unified_account_row, fill_unified_page_row
+
+def _header_map(table):
+    return {table.horizontalHeaderItem(i).data(Qt.UserRole): i for i in range(table.columnCount())}
+
+def _row_ids(table):
+    """Returns (type, id) for every row, from the data on its first cell."""
+    row_ids = []
+    for row in range(table.rowCount()):
+        item = table.item(row, 0)
+        data = item.data(Qt.UserRole) if item else None
+        row_ids.append((data.get('type'), data.get('id')) if data else (None, None))
+    return row_ids
+
+def _patch_rows(table, accounts, pages, moved_page_ids, fill_account, fill_page):
+    """Rewrites or removes the changed rows. Returns the (type, id) of every row left."""
+    to_remove, present = [], set()
+    for row, (kind, item_id) in enumerate(_row_ids(table)):
+        changed = accounts if kind == 'account' else pages
+        if item_id in changed:
+            fresh = changed[item_id]
+            if fresh is None or (kind == 'page' and item_id in moved_page_ids):
+                to_remove.append(row)
+                continue
+            (fill_account if kind == 'account' else fill_page)(row, fresh)
+        present.add((kind, item_id))
+    for row in reversed(to_remove):
+        table.removeRow(row)
+    return present
+
+def _insert_row(table, position, fill, data):
+    table.insertRow(position)
+    fill(position, data)
+
+def _insert_account(table, acc_data, profile_col, fill_account):
+    """Inserts an account row before the first account with a later profile_id."""
+    position = table.rowCount()
+    for row, (kind, _) in enumerate(_row_ids(table)):
+        item = table.item(row, profile_col)
+        if kind == 'account' and item and item.text() > acc_data[1]:
+            position = row
+            break
+    _insert_row(table, position, fill_account, acc_data)
+
+def _page_key(page_data):
+    return (page_data[22], page_data[1])
+
+def _insert_page_in_group(table, page_data, known_pages, fill_page):
+    """Inserts a page row among its account's page rows below the account row, if that is shown."""
+    row_ids = _row_ids(table)
+    if ('account', page_data[16]) not in row_ids:
+        return
+    position = row_ids.index(('account', page_data[16])) + 1
+    while position < len(row_ids) and row_ids[position][0] == 'page':
+        shown = known_pages.get(row_ids[position][1])
+        if shown and _page_key(shown) > _page_key(page_data):
+            break
+        position += 1
+    _insert_row(table, position, fill_page, page_data)
+
+def _insert_page_in_order(table, page_data, known_pages, fill_page, require_sibling=False):
+    """
+    Inserts a page row into a table of pages ordered by (profile_id, page_name).
+    With require_sibling, only when a page of the same account is already shown.
+    """
+    page_rows = [(row, known_pages.get(item_id)) for row, (kind, item_id) in enumerate(_row_ids(table)) if kind == 'page']
+    page_rows = [(row, shown) for row, shown in page_rows if shown]
+    if require_sibling and not any(shown[16] == page_data[16] for _, shown in page_rows):
+        return
+    position = next((row for row, shown in page_rows if _page_key(shown) > _page_key(page_data)), table.rowCount())
+    _insert_row(table, position, fill_page, page_data)
+
+def _new_rows(changed, present, kind):
+    return sorted((row for row in changed.values() if row and (kind, row[0]) not in present),
+                  key=_page_key if kind == 'page' else (lambda acc_data: acc_data[1]))
+
+def patch_unified_table(table, accounts, pages, moved_page_ids, known_pages, search_text, show_view, settings,
+                        show_new_account, show_new_page):
+    """
+    Updates the unified table in place. known_pages maps page_id to every cached page row.
+    show_new_account(acc_data) and show_new_page(page_data) decide whether a new row belongs in the view.
+    """
+    table.blockSignals(True)
+    header_map = _header_map(table)
+    fill_account = lambda row, acc_data: fill_unified_account_row(table, row, acc_data, search_text, header_map, settings)
+    fill_page = lambda row, page_data: fill_unified_page_row(table, row, page_data, search_text, show_view, header_map, settings)
+    present = _patch_rows(table, accounts, pages, moved_page_ids, fill_account, fill_page)
+
+    if show_view in ["Show All", "Only Accounts"] and 'profile_id' in header_map:
+        for acc_data in _new_rows(accounts, present, 'account'):
+            if show_new_account(acc_data):
+                _insert_account(table, acc_data, header_map['profile_id'], fill_account)
+    if show_view in ["Show All", "Only Pages"]:
+        for page_data in _new_rows(pages, present, 'page'):
+            if not show_new_page(page_data):
+                continue
+            if show_view == "Show All":
+                _insert_page_in_group(table, page_data, known_pages, fill_page)
+            else:
+                _insert_page_in_order(table, page_data, known_pages, fill_page, require_sibling=True)
+    table.blockSignals(False)
+
+def patch_split_tables(accounts_table, pages_table, accounts, pages, moved_page_ids, known_pages, search_text, settings,
+                       show_new_account, show_new_page):
+    """Updates both split view tables in place; the arguments are as for patch_unified_table."""
+    accounts_table.blockSignals(True)
+    header_map = _header_map(accounts_table)
+    fill_account = lambda row, acc_data: fill_split_account_row(accounts_table, row, acc_data, search_text, header_map, settings)
+    present = _patch_rows(accounts_table, accounts, {}, set(), fill_account, None)
+    if 'profile_id' in header_map:
+        for acc_data in _new_rows(accounts, present, 'account'):
+            if show_new_account(acc_data):
+                _insert_account(accounts_table, acc_data, header_map['profile_id'], fill_account)
+    accounts_table.blockSignals(False)
+
+    pages_table.blockSignals(True)
+    header_map = _header_map(pages_table)
+    fill_page = lambda row, page_data: fill_split_page_row(pages_table, row, page_data, search_text, header_map, settings)
+    present = _patch_rows(pages_table, {}, pages, moved_page_ids, None, fill_page)
+    for page_data in _new_rows(pages, present, 'page'):
+        if show_new_page(page_data):
+            _insert_page_in_order(pages_table, page_data, known_pages, fill_page)
+    pages_table.blockSignals(False)
@@ -3,17 +3,21 @@
 from PyQt5.QtWidgets import QTableWidgetItem
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
+from ui_components.sortable_table import SORT_KEY_ROLE, SortKeyItem
 
-def set_item_and_highlight(table, row, col_id, text, search_text, header_map, settings, data=None, centered=False, is_account_row=False):
+def set_item_and_highlight(table, row, col_id, text, search_text, header_map, settings, data=None, centered=False, is_account_row=False, sort_key=None):
     """
     A helper function to create, style, highlight, and set a table item.
     It now handles custom row colors for accounts and pages.
+    A sort_key makes header sorting use that value instead of the text.
     """
     col_index = header_map.get(col_id)
     if col_index is None:
         return
 
-    item = QTableWidgetItem(str(text))
+    item = (QTableWidgetItem if sort_key is None else SortKeyItem)('' if text is None else str(text))
+    if sort_key is not None:
+        item.setData(SORT_KEY_ROLE, sort_key)
     if data:
         item.setData(Qt.UserRole, data)
     if centered: